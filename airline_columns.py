@@ -0,0 +1,127 @@
+# The Columnar Store of the Airline Reservation System; airline_columns.py
+from array import array  # Import array for compact typed columns
+from bisect import bisect_left  # Import bisect for the ticket-number index
+from datetime import datetime, timedelta  # Import datetime for converting timestamps
+
+EPOCH = datetime(1970, 1, 1)  # Timestamps are stored as microseconds since this (naive) moment
+MICROSECOND = timedelta(microseconds=1)  # Unit of the stored timestamps
+NO_TIME = -(1 << 63)  # Stored in place of a missing timestamp
+EXTENSION_RANGE = 100000  # Ticket numbers look like "<passenger_id>-<5-digit extension>"
+
+# Function to turn a datetime into microseconds since the epoch (exact, no time zone conversion)
+def to_micros(moment):
+    return NO_TIME if moment is None else (moment - EPOCH) // MICROSECOND
+
+# Function to turn microseconds since the epoch back into a datetime
+def from_micros(micros):
+    return None if micros == NO_TIME else EPOCH + timedelta(microseconds=micros)
+
+# Function to encode a ticket number as an integer, or -1 if it does not have the usual shape
+def encode_ticket(ticket_number):
+    passenger, _, extension = ticket_number.partition('-')
+    if passenger.isdigit() and extension.isdigit() and len(extension) == 5:
+        return int(passenger) * EXTENSION_RANGE + int(extension)
+    return -1
+
+# Function to decode an integer ticket number
+def decode_ticket(code):
+    return f"{code // EXTENSION_RANGE}-{code % EXTENSION_RANGE:05d}"
+
+# Class for a read-only view of one row of a ReservationColumns store
+class ReservationView:
+    __slots__ = ('columns', 'row')
+
+    def __init__(self, columns, row):
+        self.columns = columns  # The store holding the data
+        self.row = row  # Row number within the store
+
+    @property
+    def passenger_id(self):
+        return self.columns.passenger_ids[self.row]  # Unique ID for the passenger
+
+    @property
+    def ticket_number(self):
+        return self.columns.ticket_number(self.row)  # Unique ticket number for the reservation
+
+    @property
+    def seat_number(self):
+        return self.columns.seat_numbers[self.row]  # Assigned seat number for the reservation
+
+    @property
+    def reservation_time(self):
+        return from_micros(self.columns.reservation_times[self.row])  # Time when the booking was made
+
+    @property
+    def cancellation_time(self):
+        return from_micros(self.columns.cancellation_times[self.row])  # Time when the reservation was cancelled
+
+# Class for storing many reservations as typed columns instead of one object per reservation
+class ReservationColumns:
+    def __init__(self):
+        self.passenger_ids = array('q')  # Passenger ID per row
+        self.ticket_codes = array('q')  # Integer-encoded ticket number per row, -1 if stored as text
+        self.seat_numbers = array('l')  # Seat number per row
+        self.reservation_times = array('q')  # Booking time per row, microseconds since the epoch
+        self.cancellation_times = array('q')  # Cancellation time per row, NO_TIME if not cancelled
+        self.other_tickets = {}  # Ticket numbers that could not be encoded, keyed by row
+        self._sorted_codes = None  # Ticket-number index: sorted codes...
+        self._sorted_rows = None  # ...and the row holding each code
+
+    # Method to build a store from reservation-like objects
+    @classmethod
+    def from_reservations(cls, reservations):
+        columns = cls()  # Create an empty store
+        for reservation in reservations:  # Append every reservation
+            columns.append(reservation)
+        return columns
+
+    # Method to add a reservation as a new row
+    def append(self, reservation):
+        row = len(self.passenger_ids)  # Number of the new row
+        code = encode_ticket(reservation.ticket_number)  # Try the compact encoding first
+        if code < 0:  # Keep unusual ticket numbers as (interned) text
+            self.other_tickets[row] = reservation.ticket_number
+        self.passenger_ids.append(reservation.passenger_id)
+        self.ticket_codes.append(code)
+        self.seat_numbers.append(reservation.seat_number)
+        self.reservation_times.append(to_micros(reservation.reservation_time))
+        self.cancellation_times.append(to_micros(reservation.cancellation_time))
+        self._sorted_codes = self._sorted_rows = None  # The ticket-number index is now stale
+        return row
+
+    # Method to get the ticket number of a row
+    def ticket_number(self, row):
+        code = self.ticket_codes[row]
+        return decode_ticket(code) if code >= 0 else self.other_tickets[row]
+
+    # Method to find the view of a ticket using its ticket number
+    def get(self, ticket_number):
+        code = encode_ticket(ticket_number)
+        if code < 0:  # Unusual ticket numbers are few, so a scan of them is cheap
+            for row, other in self.other_tickets.items():
+                if other == ticket_number:
+                    return ReservationView(self, row)
+            return None
+        if self._sorted_codes is None:  # Build the index on first lookup
+            order = sorted(range(len(self.ticket_codes)), key=self.ticket_codes.__getitem__)
+            self._sorted_codes = array('q', (self.ticket_codes[row] for row in order))
+            self._sorted_rows = array('q', order)
+        index = bisect_left(self._sorted_codes, code)  # Binary search for the code
+        if index < len(self._sorted_codes) and self._sorted_codes[index] == code:
+            return ReservationView(self, self._sorted_rows[index])
+        return None
+
+    # Method to get the view of a row
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):  # Check if the row exists
+            raise IndexError("row out of range")
+        return ReservationView(self, row % len(self))
+
+    # Method to iterate over views of every row
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ReservationView(self, row)
+
+    # Method to count the rows
+    def __len__(self):
+        return len(self.passenger_ids)
@@ -1,10 +1,12 @@
 #The Console of the Airline Reservation System; airline_console.py
+import argparse  # Import argparse for command-line options
 from airline_core import AirlineReservationSystem  # Import the AirlineReservationSystem class from airline_core module
+from airline_storage import SqliteStorage  # Import the SQLite storage backend
 
 # Class for interacting with the user via the console
 class ConsoleInterface:
-    def __init__(self):
-        self.system = AirlineReservationSystem()  # Instantiate the AirlineReservationSystem
+    def __init__(self, storage=None):
+        self.system = AirlineReservationSystem(journaled=True, storage=storage)  # Instantiate the AirlineReservationSystem with crash-safe journaling
 
     # Method to display the main menu options
     def display_menu(self):
@@ -15,7 +17,8 @@ class ConsoleInterface:
         print("4. Update a booking")  # Option to update a booking
         print("5. View ticket information")  # Option to view ticket information
         print("6. View window seat tickets")  # Option to view window seat tickets
-        print("7. Quit")  # Option to quit the application
+        print("7. View metrics")  # Option to view operation latencies, counters and gauges
+        print("8. Quit")  # Option to quit the application
         print(f"\nAvailable seats: {self.system.get_available_seats_count()}")  # Display current count of available seats
         
     # Method to handle ticket booking
@@ -55,9 +58,9 @@ class ConsoleInterface:
     def update_reservation(self):
         ticket_number = input("\nEnter ticket number: ")  # Prompt user for ticket number
         try:
-            new_seat = int(input("Enter new seat number (1-100): "))  # Prompt for new seat number
-            if not 1 <= new_seat <= 100:  # Validate seat number range
-                print("\nInvalid seat number. Must be between 1 and 100.")  # Inform user of invalid seat number
+            new_seat = int(input(f"Enter new seat number (1-{self.system.capacity}): "))  # Prompt for new seat number
+            if not 1 <= new_seat <= self.system.capacity:  # Validate seat number range
+                print(f"\nInvalid seat number. Must be between 1 and {self.system.capacity}.")  # Inform user of invalid seat number
                 return  # Exit method if invalid
         except ValueError:  # Handle non-integer input
             print("\nInvalid input. Seat must be a number.")  # Inform user of invalid input
@@ -80,7 +83,7 @@ class ConsoleInterface:
     def run(self):
         while True:  # Infinite loop to keep the menu running
             self.display_menu()  # Display the menu
-            choice = input("\nEnter your choice (1-7) : ")  # Prompt user for menu choice
+            choice = input("\nEnter your choice (1-8) : ")  # Prompt user for menu choice
             
             if choice == '1':  # If user chooses to book a ticket
                 self.book_ticket()
@@ -94,8 +97,10 @@ class ConsoleInterface:
                 self.view_ticket_info()
             elif choice == '6':  # If user chooses to view window seat tickets
                 self.view_window_seats()
-            elif choice == '7':  # If user chooses to quit
-                self.system.save_reservations()  # Save bookings to CSV
+            elif choice == '7':  # If user chooses to view metrics
+                print("\n" + self.system.metrics.to_text())  # Display the metrics dump
+            elif choice == '8':  # If user chooses to quit
+                self.system.close()  # Save bookings and close the store
                 print("\nThank you for using the Airline Reservation System!")  # Thank user for using the system
                 break  # Exit the loop
             else:
@@ -103,5 +108,9 @@ class ConsoleInterface:
     
 # Main entry point of the program
 if __name__ == "__main__":
-    console = ConsoleInterface()  # Create an instance of ConsoleInterface
+    parser = argparse.ArgumentParser(description="Airline reservation console")
+    parser.add_argument("--db", help="SQLite database shared with other processes, instead of reservations.csv")
+    args = parser.parse_args()
+    storage = SqliteStorage(args.db, import_csv="reservations.csv") if args.db else None  # A new database starts from the CSV
+    console = ConsoleInterface(storage)  # Create an instance of ConsoleInterface
     console.run()  # Run the console interface
\ No newline at end of file
@@ -3,9 +3,25 @@ import csv  # Import the csv module for handling CSV file operations
 import random  # Import the random module for generating random numbers
 from datetime import datetime  # Import datetime for handling date and time
 import os  # Import os module for interacting with the operating system
+import threading  # Import threading for the booking locks
+from contextlib import ExitStack  # Import ExitStack for holding several ticket locks at once
+from bisect import bisect_left, insort  # Import bisect for the sorted seat-class indexes
+from airline_journal import OP_BOOK, OP_CANCEL, OP_UPDATE  # Import the change record operations
+from airline_inventory import FlightInventory, SEAT_CLASSES, WINDOW, AISLE, seat_class  # Import the per-flight seat inventory
+from airline_history import ReservationHistory  # Import the cancellation and seat-change history
+from airline_metrics import Metrics, timed  # Import the metrics layer
+from airline_storage import FileStorage, transactional  # Import the storage backends
+
+# Number of lock stripes that serialize operations on the same ticket
+TICKET_LOCK_STRIPES = 64
+
+# Column names of the CSV snapshot
+CSV_FIELDS = ['passenger_id', 'ticket_number', 'seat_number', 'reservation_time', 'cancellation_time']
 
 # Class to represent a booking
 class Reservation:
+    __slots__ = ('passenger_id', 'ticket_number', 'seat_number', 'reservation_time', 'cancellation_time')  # No per-object dict
+
     def __init__(self, passenger_id, ticket_number, seat_number, reservation_time):
         self.passenger_id = passenger_id  # Unique ID for the passenger
         self.ticket_number = ticket_number  # Unique ticket number for the reservation
@@ -15,67 +31,102 @@ class Reservation:
 
 # Class for managing the airline reservation system
 class AirlineReservationSystem:
-    def __init__(self, csv_file="reservations.csv"):
-        self.csv_file = csv_file  # Path to the CSV file storing bookings
+    def __init__(self, csv_file="reservations.csv", journaled=False, flight_id="default", capacity=100, snapshot_file=None,
+                 storage=None):
+        self.storage = storage or FileStorage(csv_file, journaled, snapshot_file)  # Where reservations are kept
+        self.snapshot = None  # Memory-mapped snapshot the reservations are lazily decoded from
         self.reservations = {}  # Dictionary to store bookings with ticket_number as key
-        self.seats = set(range(1, 101))  # Set of available seats (1-100)
-        self.used_passenger_ids = set()  # Set to track passenger IDs that have been used
-        self.load_reservations()  # Load existing bookings from the CSV file
+        self.capacity = capacity  # Number of seats on the aircraft, numbered 1..capacity
+        self.inventory = FlightInventory()  # Seat inventory keyed by flight ID
+        self.flight = self.inventory.add_flight(flight_id, capacity, pooled=True)  # The flight this system books
+        self.seats = self.flight.seats  # Available seats, with O(1) random and preference picks
+        self.passenger_ids = self.storage.id_allocator()  # Passenger IDs, unique across the processes sharing the store
+        self.seat_tickets = [None] * (capacity + 1)  # Index of the ticket holding each seat
+        self.passenger_tickets = {}  # Index of the tickets held by each passenger ID
+        self.class_seats = None  # Sorted booked seats per seat class, built from the seat map on first use
+        self.seat_lock = self.flight.lock  # Per-flight lock guarding the seat map and seat indexes
+        self.ticket_locks = [threading.Lock() for _ in range(TICKET_LOCK_STRIPES)]  # Striped per-ticket locks
+        self.history = ReservationHistory()  # Cancelled reservations and time-ordered booking, cancellation and move events
+        self.journal = None  # Write-ahead journal, only used in journaled mode
+        self.metrics = Metrics()  # Operation latencies, counters and gauges
+        self.metrics.gauge('seats.free', lambda: len(self.seats))  # Seats still available
+        self.metrics.gauge('seats.occupancy', lambda: 1 - len(self.seats) / self.capacity if self.capacity else 0.0)  # Share of seats booked
+        self.metrics.gauge('ids.last_passenger_id', lambda: self.passenger_ids.last_id)  # Highest passenger ID in use
+        self.metrics.gauge('ids.block_remaining', lambda: self.passenger_ids.remaining)  # IDs left before the next lease
+        self.metrics.gauge('reservations.active', lambda: len(self.reservations))  # Current bookings
+        self.metrics.gauge('history.cancelled', lambda: self.history.cancelled_count())  # Cancelled reservations kept
+        self.load_reservations()  # Load existing bookings from the store
 
     # Method to generate a unique passenger ID
     def generate_passenger_id(self):
-        while True:
-            passenger_id = random.randint(100, 999)  # Generate a random passenger ID
-            if passenger_id not in self.used_passenger_ids:  # Check if the ID is unique
-                self.used_passenger_ids.add(passenger_id)  # Add to used IDs
-                return passenger_id  # Return the unique passenger ID
+        return self.passenger_ids.next_id()  # Return the next never-used passenger ID
 
     # Method to generate a unique ticket number based on passenger ID
     def generate_ticket_number(self, passenger_id):
-        extension = random.randint(10000, 99999)  # Generate a random extension
-        return f"{passenger_id}-{extension}"  # Return formatted ticket number
+        while True:
+            extension = random.randint(10000, 99999)  # Generate a random extension
+            ticket_number = f"{passenger_id}-{extension}"  # Format the ticket number
+            if ticket_number not in self.reservations:  # Unique passenger IDs make a clash practically impossible
+                return ticket_number  # Return formatted ticket number
+
+    # Method to get the lock stripe that serializes operations on a ticket
+    def ticket_lock(self, ticket_number):
+        return self.ticket_locks[hash(ticket_number) % TICKET_LOCK_STRIPES]
 
-    # Method to get an available seat at random
-    def get_available_seat(self):
-        if not self.seats:  # Check if there are no available seats
-            return None  # Return None if no seats are available
-        return random.choice(list(self.seats))  # Return a random available seat
+    # Method to get an available seat, at random unless a preference (window, middle, aisle, lowest) is given
+    def get_available_seat(self, preference=None):
+        return self.seats.pick(preference)  # Return an available seat, or None if no seats are available
 
     # Method to book a ticket
-    def reserve_ticket(self):
+    @timed('reserve_ticket')
+    @transactional
+    def reserve_ticket(self, preference=None):
         if not self.seats:  # Check if there are no seats available
             return None, "No seats available"  # Return error message if no seats are available
 
         passenger_id = self.generate_passenger_id()  # Generate a new passenger ID
         ticket_number = self.generate_ticket_number(passenger_id)  # Generate a ticket number
-        seat_number = self.get_available_seat()  # Get an available seat
+        with self.ticket_lock(ticket_number):  # A cancel or move of the new ticket must be logged after its booking
+            with self.seat_lock:  # Pick and claim the seat as one step
+                seat_number = self.get_available_seat(preference)  # Get an available seat
 
-        if seat_number is None:  # Check if seat_number is None
-            return None, "No seats available"  # Return error if no seat is available
+                if seat_number is None:  # Check if seat_number is None
+                    return None, "No seats available"  # Return error if no seat is available
 
-        self.seats.remove(seat_number)  # Remove the reserved seat from available seats
-        reservation = Reservation(
-            passenger_id=passenger_id,  # Create a new reservation instance
-            ticket_number=ticket_number,
-            seat_number=seat_number,
-            reservation_time=datetime.now()  # Set the current time as reservation time
-        )
-        self.reservations[ticket_number] = reservation  # Store the reservation in the reservations dictionary
-        return reservation, "Booking successful"  # Return the reservation and success message
+                self.seats.claim(seat_number)  # Remove the reserved seat from available seats
+                reservation = Reservation(
+                    passenger_id=passenger_id,  # Create a new reservation instance
+                    ticket_number=ticket_number,
+                    seat_number=seat_number,
+                    reservation_time=datetime.now()  # Set the current time as reservation time
+                )
+                self.reservations[ticket_number] = reservation  # Store the reservation in the reservations dictionary
+                self._index_add(reservation)  # Add the reservation to the secondary indexes
+                self.history.record_booking(reservation)  # Add the booking to the history
+            self.storage.record([(OP_BOOK, passenger_id, ticket_number, seat_number, reservation.reservation_time)])  # Persist the booking
+            return reservation, "Booking successful"  # Return the reservation and success message
 
     # Method to cancel a reserved ticket
+    @timed('cancel_ticket')
+    @transactional
     def cancel_ticket(self, ticket_number):
-        if ticket_number not in self.reservations:  # Check if the ticket number exists
-            return False, "Ticket not found"  # Return error if ticket not found
+        with self.ticket_lock(ticket_number):  # Serialize with other changes to this ticket
+            reservation = self.reservations.get(ticket_number)  # Retrieve reservation details
+            if reservation is None:  # Check if the ticket number exists
+                return False, "Ticket not found"  # Return error if ticket not found
 
-        reservation = self.reservations[ticket_number]  # Retrieve reservation details
-        if reservation.cancellation_time:  # Check if the ticket is already cancelled
-            return False, "Ticket already cancelled"  # Return error if already cancelled
+            if reservation.cancellation_time:  # Check if the ticket is already cancelled
+                return False, "Ticket already cancelled"  # Return error if already cancelled
 
-        self.seats.add(reservation.seat_number)  # Add the seat back to available seats
-        reservation.cancellation_time = datetime.now()  # Set the cancellation time to now
-        del self.reservations[ticket_number]  # Remove the reservation from the dictionary
-        return True, "Cancellation Successful"  # Return success message
+            with self.seat_lock:  # Free the seat and update the indexes together
+                self.seats.release(reservation.seat_number)  # Add the seat back to available seats
+                reservation.cancellation_time = datetime.now()  # Set the cancellation time to now
+                del self.reservations[ticket_number]  # Remove the reservation from the dictionary
+                self._index_remove(reservation)  # Remove the reservation from the secondary indexes
+                self.history.record_cancellation(reservation)  # Keep the cancelled reservation in the history
+            self.storage.record([(OP_CANCEL, reservation.passenger_id, ticket_number,  # Persist the cancellation
+                                  reservation.seat_number, reservation.cancellation_time)])
+            return True, "Cancellation Successful"  # Return success message
 
     # Method to retrieve information about a ticket using its ticket number
     def get_ticket_info(self, ticket_number):
@@ -83,70 +134,259 @@ class AirlineReservationSystem:
 
     # Method to count how many seats are available
     def get_available_seats_count(self):
+        self.storage.sync(self)  # Pick up bookings made by other processes
         return len(self.seats)  # Return the number of available seats
 
+    # Method to get a sorted list of (seat, ticket) pairs for the booked seats of one class
+    def get_seats_by_class(self, cls):
+        self.storage.sync(self)  # Pick up bookings made by other processes
+        with self.seat_lock:  # Read a consistent view of the seat indexes
+            return [(seat, self.seat_tickets[seat]) for seat in self._class_index()[cls]]  # The index is already sorted
+
     # Method to get a list of window seats
     def get_window_seats(self):
-        window_seats = []  # List to hold window seats
-        for reservation in self.reservations.values():  # Iterate through all reservations
-            if reservation.seat_number % 3 == 1:  # Check if seat is a window seat
-                window_seats.append((reservation.seat_number, reservation.ticket_number))  # Add to list
-        return sorted(window_seats)  # Return sorted list of window seats
+        return self.get_seats_by_class(WINDOW)  # Return sorted list of window seats
+
+    # Method to get a list of aisle seats
+    def get_aisle_seats(self):
+        return self.get_seats_by_class(AISLE)  # Return sorted list of aisle seats
+
+    # Method to find the reservation holding a seat
+    def get_seat_occupant(self, seat_number):
+        if not 0 < seat_number <= self.capacity:  # Check if the seat exists
+            return None
+        self.storage.sync(self)  # Pick up bookings made by other processes
+        ticket_number = self.seat_tickets[seat_number]  # Look up the ticket holding the seat (a single read, no lock needed)
+        return self.reservations.get(ticket_number) if ticket_number else None  # Return reservation details if booked
+
+    # Method to get the reservations held by a passenger
+    def get_passenger_reservations(self, passenger_id):
+        if isinstance(self.passenger_tickets, dict):  # The in-memory index changes under the seat lock
+            with self.seat_lock:
+                tickets = set(self.passenger_tickets.get(passenger_id, ()))  # Copy the passenger's tickets
+        else:  # A database index borrows a connection, which must never be waited for while holding the seat lock
+            tickets = set(self.passenger_tickets.get(passenger_id, ()))  # Query the passenger's tickets
+        if self.snapshot:  # Tickets still in the snapshot are found through its ticket index
+            tickets.update(self.snapshot.passenger_tickets(passenger_id))
+        reservations = [self.reservations.get(ticket_number) for ticket_number in sorted(tickets)]  # Skip cancelled tickets
+        return [reservation for reservation in reservations if reservation]  # Return their reservation details
+
+    # Method to add a reservation to the secondary indexes
+    def _index_add(self, reservation):
+        self.seat_tickets[reservation.seat_number] = reservation.ticket_number  # Seat -> ticket
+        self.passenger_tickets.setdefault(reservation.passenger_id, set()).add(reservation.ticket_number)  # Passenger -> tickets
+        self._class_add(reservation.seat_number)  # Seat class -> seats
+
+    # Method to remove a reservation from the secondary indexes
+    def _index_remove(self, reservation):
+        self.seat_tickets[reservation.seat_number] = None  # Seat -> ticket
+        tickets = self.passenger_tickets.get(reservation.passenger_id)  # Passenger -> tickets
+        if tickets is not None:  # Tickets still in the snapshot are not in this index
+            tickets.discard(reservation.ticket_number)
+            if not tickets:  # Drop passengers without tickets
+                del self.passenger_tickets[reservation.passenger_id]
+        self._class_discard(reservation.seat_number)  # Seat class -> seats
+
+    # Method to move a reservation to a new seat in the secondary indexes
+    def _index_move(self, reservation, old_seat):
+        self.seat_tickets[old_seat] = None  # Free the old seat
+        self.seat_tickets[reservation.seat_number] = reservation.ticket_number  # Take the new seat
+        self._class_discard(old_seat)  # Remove the old seat from its class
+        self._class_add(reservation.seat_number)  # Add the new seat to its class
+
+    # Method to get the seat-class index, building it from the seat map on first use
+    def _class_index(self):
+        if self.class_seats is None:  # One pass over the cabin instead of one sorted insert per loaded booking
+            self.class_seats = {cls: [seat for seat in range(first, self.capacity + 1, 3) if not self.seats.is_free(seat)]
+                                for first, cls in zip((1, 2, 3), SEAT_CLASSES)}
+        return self.class_seats
+
+    # Method to add a seat to its sorted seat-class index
+    def _class_add(self, seat_number):
+        if self.class_seats is not None:  # Nothing to maintain until the index is first used
+            insort(self.class_seats[seat_class(seat_number)], seat_number)
 
-    # Method to load existing reservations from the CSV file
+    # Method to remove a seat from its sorted seat-class index
+    def _class_discard(self, seat_number):
+        if self.class_seats is None:  # Nothing to maintain until the index is first used
+            return
+        seats = self.class_seats[seat_class(seat_number)]  # Sorted seats of the seat's class
+        index = bisect_left(seats, seat_number)  # Binary search for the seat
+        if index < len(seats) and seats[index] == seat_number:
+            del seats[index]
+
+    # Method to load existing reservations from the store
+    @timed('load_reservations')
     def load_reservations(self):
-        if not os.path.exists(self.csv_file):  # Check if the CSV file exists
-            return  # Exit if the file does not exist
+        self.storage.open(self, Reservation)  # The backend fills the seat map, indexes and history
 
-        try:
-            with open(self.csv_file, 'r', newline='') as file:  # Open the CSV file
-                reader = csv.DictReader(file)  # Create a CSV reader
-                for row in reader:  # Iterate through each row in the CSV
-                    reservation = Reservation(
-                        passenger_id=int(row['passenger_id']),  # Create a reservation object
-                        ticket_number=row['ticket_number'],
-                        seat_number=int(row['seat_number']),
-                        reservation_time=datetime.fromisoformat(row['reservation_time'])  # Convert time to datetime object
-                    )
-                    self.reservations[reservation.ticket_number] = reservation  # Store reservation in dictionary
-                    self.seats.remove(reservation.seat_number)  # Remove seat from available seats
-                    self.used_passenger_ids.add(reservation.passenger_id)  # Add customer ID to used IDs
-
-        except (FileNotFoundError, csv.Error) as e:  # Handle file not found or CSV errors
-            print(f"Error loading reservations: {e}")  # Print error message
-
-    # Method to save current reservations to the CSV file
+    # Method to take the raw fields of every current reservation and the number of cancelled ones (called with the seat lock held)
+    def csv_records(self):
+        live = [(reservation.passenger_id, reservation.ticket_number, reservation.seat_number, reservation.reservation_time)
+                for reservation in list(self.reservations.values())]
+        return live, self.history.cancelled_count()  # Cancelled rows are only ever appended, so a count pins them down
+
+    # Method to format the CSV rows of records taken by csv_records, without holding the seat lock
+    def csv_rows(self, records):
+        live, cancelled_count = records
+        rows = [(passenger_id, ticket_number, seat_number, reservation_time.isoformat(), '')  # Convert datetime to ISO format
+                for passenger_id, ticket_number, seat_number, reservation_time in live]
+        rows.extend((reservation.passenger_id, reservation.ticket_number, reservation.seat_number,
+                     reservation.reservation_time.isoformat(), reservation.cancellation_time.isoformat())
+                    for reservation in self.history.cancelled_reservations()[:cancelled_count])
+        return rows
+
+    # Method to write every current and cancelled reservation to a CSV file atomically; records may be taken beforehand
+    def export_csv(self, csv_file, records=None):
+        if records is None:
+            with self.seat_lock:  # A concurrent cancel must not leave a ticket both live and cancelled
+                records = self.csv_records()
+        rows = self.csv_rows(records)  # Format outside the seat lock
+        temp_file = csv_file + ".tmp"  # Write beside the target so the rename is atomic
+        with open(temp_file, 'w', newline='') as file:  # Open the temporary file for writing
+            writer = csv.writer(file)  # Create a CSV writer
+            writer.writerow(CSV_FIELDS)  # Write the header row to the CSV
+            writer.writerows(rows)  # Write all reservations
+            file.flush()  # Hand the data to the OS
+            os.fsync(file.fileno())  # Make the snapshot durable before it replaces the old one
+        os.replace(temp_file, csv_file)  # Swap in the new file
+
+    # Method to save current reservations to the store
+    @timed('save_reservations')
     def save_reservations(self):
         try:
-            with open(self.csv_file, 'w', newline='') as file:  # Open the CSV file for writing
-                writer = csv.DictWriter(file, fieldnames=[
-                    'passenger_id', 'ticket_number', 'seat_number',
-                    'reservation_time', 'cancellation_time'  # Define fieldnames for CSV
-                ])
-                writer.writeheader()  # Write the header row to the CSV
-                for reservation in self.reservations.values():  # Iterate through all reservations
-                    writer.writerow({
-                        'passenger_id': reservation.passenger_id,  # Write reservation details to CSV
-                        'ticket_number': reservation.ticket_number,
-                        'seat_number': reservation.seat_number,
-                        'reservation_time': reservation.reservation_time.isoformat(),  # Convert datetime to ISO format
-                        'cancellation_time': reservation.cancellation_time.isoformat() if reservation.cancellation_time else '' }) # Handle optional cancellation time
-                    
+            self.storage.save(self)  # Write the snapshot, or whatever the backend keeps
 
         except Exception as e:  # Handle any exception during file operation
             print(f"Error saving reservations: {e}")  # Print error message
 
+    # Method to save reservations and release the store
+    def close(self):
+        self.save_reservations()  # Write the final snapshot
+        self.storage.close(self)  # Close the journal, snapshot or connections
+
     # Method to update a reservation with a new seat number
+    @timed('update_reservation')
+    @transactional
     def update_reservation(self, ticket_number, new_seat_number):
-        if ticket_number not in self.reservations:  # Check if the ticket number exists
-            return False, "Ticket not found"  # Return error if ticket not found
-
-        if new_seat_number not in self.seats:  # Check if the new seat is available
-            return False, "Selected seat is not available"  # Return error if seat is not available
-
-        reservations = self.reservations[ticket_number]  # Retrieve the reservation
-        old_seat = reservations.seat_number  # Store the old seat number
-        self.seats.add(old_seat)  # Add the old seat back to available seats
-        self.seats.remove(new_seat_number)  # Remove the new seat from available seats
-        reservations.seat_number = new_seat_number  # Update the reservation with the new seat number
-        return True, "Booking updated successfully"  # Return success message
\ No newline at end of file
+        with self.ticket_lock(ticket_number):  # Serialize with other changes to this ticket
+            reservations = self.reservations.get(ticket_number)  # Retrieve the reservation
+            if reservations is None:  # Check if the ticket number exists
+                return False, "Ticket not found"  # Return error if ticket not found
+
+            with self.seat_lock:  # Claim the new seat and update the indexes together
+                old_seat = reservations.seat_number  # Store the old seat number
+                if not self.seats.move(old_seat, new_seat_number):  # Claim the new seat and free the old one
+                    return False, "Selected seat is not available"  # Return error if seat is not available
+                reservations.seat_number = new_seat_number  # Update the reservation with the new seat number
+                self._index_move(reservations, old_seat)  # Move the reservation in the secondary indexes
+                now = datetime.now()  # Time of the seat change
+                self.history.record_move(now, old_seat, new_seat_number)  # Add the seat change to the history
+            self.storage.record([(OP_UPDATE, reservations.passenger_id, ticket_number, new_seat_number, now)])  # Persist the seat change
+            return True, "Booking updated successfully"  # Return success message
+
+    # Method to get the lock stripes covering several tickets, in a fixed order so batches cannot deadlock
+    def _ticket_locks_for(self, ticket_numbers):
+        stripes = sorted({hash(ticket_number) % TICKET_LOCK_STRIPES for ticket_number in ticket_numbers})
+        return [self.ticket_locks[stripe] for stripe in stripes]
+
+    # Method to book several tickets at once; either every ticket is booked or none is
+    @timed('reserve_many')
+    @transactional
+    def reserve_many(self, n, preferences=None):
+        if n < 1:  # A batch books at least one ticket
+            return None, "Number of tickets must be at least 1"
+        if isinstance(preferences, (list, tuple)) and len(preferences) != n:  # One preference per ticket
+            return None, "Number of preferences does not match number of tickets"
+        if not isinstance(preferences, (list, tuple)):  # The same preference (or none) for every ticket
+            preferences = [preferences] * n
+
+        with self.seat_lock:  # Check, pick and claim every seat as one step
+            if self.seats.free_count < n:  # Check if the whole group fits
+                return None, "Not enough seats available"
+            booked = []  # Reservations made by this batch
+            now = datetime.now()  # One timestamp for the whole batch
+            passenger_ids = self.passenger_ids.next_ids(n)  # Generate every passenger ID in one step
+            for passenger_id, preference in zip(passenger_ids, preferences):
+                ticket_number = self.generate_ticket_number(passenger_id)  # Generate a ticket number
+                seat_number = self.get_available_seat(preference)  # Get an available seat
+                self.seats.claim(seat_number)  # Remove the reserved seat from available seats
+                reservation = Reservation(passenger_id, ticket_number, seat_number, now)  # Create the reservation
+                self.reservations[ticket_number] = reservation  # Store the reservation
+                self._index_add(reservation)  # Add the reservation to the secondary indexes
+                self.history.record_booking(reservation)  # Add the booking to the history
+                booked.append(reservation)
+            if booked:  # Persist the whole batch with a single write, before another thread can change these tickets
+                self.storage.record([(OP_BOOK, reservation.passenger_id, reservation.ticket_number,
+                                      reservation.seat_number, now) for reservation in booked])
+        return booked, f"Booked {len(booked)} tickets"  # Return the reservations and success message
+
+    # Method to cancel several tickets at once; either every ticket is cancelled or none is
+    @timed('cancel_many')
+    @transactional
+    def cancel_many(self, ticket_numbers):
+        ticket_numbers = list(ticket_numbers)  # Allow any iterable
+        if len(set(ticket_numbers)) != len(ticket_numbers):  # Each ticket may appear once
+            return False, "Duplicate ticket number in batch"
+        with ExitStack() as stack:
+            for lock in self._ticket_locks_for(ticket_numbers):  # Serialize with other changes to these tickets
+                stack.enter_context(lock)
+            for ticket_number in ticket_numbers:  # Validate the whole batch before changing anything
+                if ticket_number not in self.reservations:
+                    return False, f"Ticket not found: {ticket_number}"
+
+            now = datetime.now()  # One timestamp for the whole batch
+            cancelled = []  # Reservations cancelled by this batch
+            with self.seat_lock:  # Free the seats and update the indexes together
+                for ticket_number in ticket_numbers:
+                    reservation = self.reservations.pop(ticket_number)  # Remove the reservation from the dictionary
+                    self.seats.release(reservation.seat_number)  # Add the seat back to available seats
+                    reservation.cancellation_time = now  # Set the cancellation time
+                    self._index_remove(reservation)  # Remove the reservation from the secondary indexes
+                    self.history.record_cancellation(reservation)  # Keep the cancelled reservation in the history
+                    cancelled.append(reservation)
+            if cancelled:  # Persist the whole batch with a single write
+                self.storage.record([(OP_CANCEL, reservation.passenger_id, reservation.ticket_number,
+                                           reservation.seat_number, now) for reservation in cancelled])
+            return True, f"Cancelled {len(cancelled)} tickets"  # Return success message
+
+    # Method to move several tickets at once from (ticket_number, new_seat_number) pairs; seats may be swapped
+    @timed('update_many')
+    @transactional
+    def update_many(self, pairs):
+        pairs = [(ticket_number, new_seat_number) for ticket_number, new_seat_number in pairs]  # Allow any iterable
+        ticket_numbers = [ticket_number for ticket_number, _ in pairs]
+        if len(set(ticket_numbers)) != len(ticket_numbers):  # Each ticket may appear once
+            return False, "Duplicate ticket number in batch"
+        if len({new_seat_number for _, new_seat_number in pairs}) != len(pairs):  # Two tickets cannot share a seat
+            return False, "Duplicate seat number in batch"
+        with ExitStack() as stack:
+            for lock in self._ticket_locks_for(ticket_numbers):  # Serialize with other changes to these tickets
+                stack.enter_context(lock)
+            with self.seat_lock:  # Validate and apply the whole batch as one step
+                moves = []  # (reservation, old_seat, new_seat) for every ticket in the batch
+                for ticket_number, new_seat_number in pairs:
+                    reservation = self.reservations.get(ticket_number)  # Retrieve the reservation
+                    if reservation is None:  # Check if the ticket number exists
+                        return False, f"Ticket not found: {ticket_number}"
+                    moves.append((reservation, reservation.seat_number, new_seat_number))
+                vacated = {old_seat for _, old_seat, _ in moves}  # Seats this batch gives up
+                for _, _, new_seat in moves:  # Every target must be free or given up by the batch
+                    if not (self.seats.is_free(new_seat) or new_seat in vacated):
+                        return False, f"Selected seat is not available: {new_seat}"
+
+                for reservation, old_seat, _ in moves:  # Give up every old seat first...
+                    self.seats.release(old_seat)
+                    self.seat_tickets[old_seat] = None
+                    self._class_discard(old_seat)
+                now = datetime.now()  # One timestamp for the whole batch
+                for reservation, old_seat, new_seat in moves:  # ...then take every new seat
+                    self.seats.claim(new_seat)
+                    reservation.seat_number = new_seat  # Update the reservation with the new seat number
+                    self.seat_tickets[new_seat] = reservation.ticket_number
+                    self._class_add(new_seat)
+                    self.history.record_move(now, old_seat, new_seat)  # Add the seat change to the history
+            if moves:  # Persist the whole batch with a single write
+                self.storage.record([(OP_UPDATE, reservation.passenger_id, reservation.ticket_number, new_seat, now)
+                                          for reservation, _, new_seat in moves])
+            return True, f"Updated {len(moves)} bookings"  # Return success message
\ No newline at end of file
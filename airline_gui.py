@@ -1,16 +1,26 @@
+import argparse  # Import argparse for command-line options
 import tkinter as tk  # Import the tkinter module for GUI creation
 from tkinter import ttk, messagebox  # Import ttk for themed widgets and messagebox for dialogs
 from airline_core import AirlineReservationSystem  # Import the AirlineReservationSystem class
+from airline_inventory import seat_class  # Import the seat-class lookup for the seat map
+from airline_widgets import BackgroundWorker, VirtualList  # Import the worker thread and the virtualized list
+from airline_storage import SqliteStorage  # Import the SQLite storage backend
 
 # Class for the Airline Reservation GUI
 class AirlineReservationGUI:
-    def __init__(self, root):
+    def __init__(self, root, storage=None):
         self.root = root  # Main application window
+        self.storage = storage  # Storage backend, or None for the journaled CSV file
         self.root.title("Airline Reservation System")  # Set the window title
-        self.system = AirlineReservationSystem()  # Instantiate the airline reservation system
-        
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_application)  # Save before the window closes
+        self.system = None  # The reservation system, once loaded on the worker thread
+        self.worker = BackgroundWorker(root)  # Runs core calls and saves off the Tk thread
+        self.closing = False  # Set once the final save has been requested; no core calls are submitted after it
+        self.buttons = []  # Buttons that need a loaded system
+
         self.setup_gui()  # Set up the GUI components
-        self.update_seats_label()  # Update the available seats label initially
+        self.set_busy("Loading reservations...")  # Loading can take a while with large datasets
+        self.worker.submit(self.load_system, self.system_loaded, self.show_error)  # Load without freezing the window
         
     # Method to set up the GUI components
     def setup_gui(self):
@@ -22,25 +32,72 @@ class AirlineReservationGUI:
         self.seats_label.grid(row=0, column=0, columnspan=2, pady=5)  # Place label in the grid
         
         # Buttons for various functionalities
-        ttk.Button(main_frame, text="Book Ticket", command=self.reserve_ticket).grid(row=1, column=0, pady=5, padx=5)  # Book Ticket button
-        ttk.Button(main_frame, text="Cancel Ticket", command=self.show_cancel_dialog).grid(row=1, column=1, pady=5, padx=5)  # Cancel Ticket button
-        ttk.Button(main_frame, text="View Ticket Info", command=self.show_ticket_info_dialog).grid(row=2, column=0, pady=5, padx=5)  # View Ticket Info button
-        ttk.Button(main_frame, text="Update Booking", command=self.show_update_dialog).grid(row=2, column=1, pady=5, padx=5)  # Update Booking button
-        ttk.Button(main_frame, text="View Window Seats", command=self.show_window_seats).grid(row=3, column=0, pady=5, padx=5)  # View Window Seats button
-        ttk.Button(main_frame, text="Quit", command=self.quit_application).grid(row=3, column=1, pady=5, padx=5)  # Quit button
-    
-    # Method to update the available seats label
-    def update_seats_label(self):
-        self.seats_label.config(text=f"Available seats: {self.system.get_available_seats_count()}")  # Update label with available seats count
+        for text, command, row, column in (
+            ("Book Ticket", self.reserve_ticket, 1, 0),  # Book Ticket button
+            ("Cancel Ticket", self.show_cancel_dialog, 1, 1),  # Cancel Ticket button
+            ("View Ticket Info", self.show_ticket_info_dialog, 2, 0),  # View Ticket Info button
+            ("Update Booking", self.show_update_dialog, 2, 1),  # Update Booking button
+            ("View Window Seats", self.show_window_seats, 3, 0),  # View Window Seats button
+            ("View Seat Map", self.show_seat_map, 3, 1),  # View Seat Map button
+        ):
+            button = ttk.Button(main_frame, text=text, command=command, state=tk.DISABLED)  # Enabled once the system is loaded
+            button.grid(row=row, column=column, pady=5, padx=5)
+            self.buttons.append(button)
+        ttk.Button(main_frame, text="Quit", command=self.quit_application).grid(row=4, column=0, columnspan=2, pady=5, padx=5)  # Quit button
+
+    # Method to show that work is running on the worker thread
+    def set_busy(self, text):
+        self.seats_label.config(text=text)  # Replace the seat count while busy
+        for button in self.buttons:
+            button.config(state=tk.DISABLED)
+
+    # Method to load the system; runs on the worker thread, so a quit queued behind it always sees the system
+    def load_system(self):
+        self.system = AirlineReservationSystem(journaled=True, storage=self.storage)  # Instantiate the airline reservation system with crash-safe journaling
+        return self.system.get_available_seats_count()  # Count the seats here too, not on the Tk thread
+
+    # Method to enable the buttons once the system has loaded
+    def system_loaded(self, available):
+        for button in self.buttons:
+            button.config(state=tk.NORMAL)
+        self.show_seats(available)  # Show the available seats initially
+
+    # Method to run a core call on the worker thread; the seat count is read there as well and shown before on_done(result)
+    def submit(self, call, on_done=None):
+        if self.closing:  # The system is being saved and closed
+            return
+
+        def work():  # Runs on the worker thread
+            return call(), self.system.get_available_seats_count()
+
+        def done(value):  # Runs on the Tk thread
+            result, available = value
+            self.show_seats(available)  # Update available seats label
+            if on_done:
+                on_done(result)
+
+        self.worker.submit(work, done, self.show_error)
+
+    # Method to report an exception raised on the worker thread
+    def show_error(self, error):
+        messagebox.showerror("Error", str(error))  # Show the error message
+        if self.system and not self.closing:  # The system is still usable; refresh the count on the worker
+            self.worker.submit(self.system.get_available_seats_count, self.show_seats)
+
+    # Method to update the available seats label with a count read on the worker thread
+    def show_seats(self, available):
+        self.seats_label.config(text=f"Available seats: {available}")  # Update label with available seats count
         
     # Method to book a ticket and show result message
     def reserve_ticket(self):
-        reservation, message = self.system.reserve_ticket()  # Attempt to book a ticket
-        if reservation:  # Check if reservation was successful
-            messagebox.showinfo("Booking Successful", f"Ticket number: {reservation.ticket_number}\n" f"Seat number: {reservation.seat_number}")  # Show success message
-        else:
-            messagebox.showerror("Booking Error", message)  # Show error message if reservation failed
-        self.update_seats_label()  # Update available seats label after reservation
+        def done(result):  # Runs on the Tk thread once the booking is made
+            reservation, message = result
+            if reservation:  # Check if reservation was successful
+                messagebox.showinfo("Booking Successful", f"Ticket number: {reservation.ticket_number}\n" f"Seat number: {reservation.seat_number}")  # Show success message
+            else:
+                messagebox.showerror("Booking Error", message)  # Show error message if reservation failed
+
+        self.submit(self.system.reserve_ticket, done)  # Attempt to book a ticket
             
     # Method to show dialog for cancelling a ticket
     def show_cancel_dialog(self):
@@ -51,14 +108,17 @@ class AirlineReservationGUI:
         ticket_entry = ttk.Entry(dialog)  # Entry widget for ticket number
         ticket_entry.grid(row=0, column=1, pady=5, padx=5)  # Place entry in the grid
         
-        def cancel():  # Inner function to handle cancellation
-            ticket_number = ticket_entry.get()  # Get ticket number from entry
-            success, message = self.system.cancel_ticket(ticket_number)  # Attempt to cancel the ticket
+        def done(result):  # Runs on the Tk thread once the cancellation is made
+            success, message = result
             messagebox.showinfo("Cancellation Result", message)  # Show result message
-            
+
             if success:  # If cancellation was successful
-                self.update_seats_label()  # Update available seats label
-                dialog.destroy()  # Close the dialog
+                if dialog.winfo_exists():  # The user may have closed it meanwhile
+                    dialog.destroy()  # Close the dialog
+
+        def cancel():  # Inner function to handle cancellation
+            ticket_number = ticket_entry.get()  # Get ticket number from entry
+            self.submit(lambda: self.system.cancel_ticket(ticket_number), done)  # Attempt to cancel the ticket
                 
         ttk.Button(dialog, text="Cancel Ticket", command=cancel).grid(row=1, column=0, columnspan=2, pady=5)  # Button to perform cancellation
                 
@@ -71,9 +131,7 @@ class AirlineReservationGUI:
         ticket_entry = ttk.Entry(dialog)  # Entry widget for ticket number
         ticket_entry.grid(row=0, column=1, pady=5, padx=5)  # Place entry in the grid
         
-        def view_info():  # Inner function to view ticket information
-            ticket_number = ticket_entry.get()  # Get ticket number from entry
-            reservation = self.system.get_ticket_info(ticket_number)  # Retrieve booking information
+        def done(reservation):  # Runs on the Tk thread once the ticket is looked up
             if reservation:  # Check if reservation exists
                 messagebox.showinfo("Ticket Information",
                                     f"Passenger ID: {reservation.passenger_id}\n"
@@ -82,8 +140,12 @@ class AirlineReservationGUI:
                                     f"Reservation time: {reservation.reservation_time}")  # Show ticket information
             else:
                 messagebox.showerror("Error", "Ticket not found")  # Show error if ticket is not found
+
+        def view_info():  # Inner function to view ticket information
+            ticket_number = ticket_entry.get()  # Get ticket number from entry
+            self.submit(lambda: self.system.get_ticket_info(ticket_number), done)  # Retrieve booking information
             dialog.destroy()  # Close the dialog
-            
+
         ttk.Button(dialog, text="View Info", command=view_info).grid(row=1, column=0, columnspan=2, pady=5)  # Button to view info
             
     # Method to show dialog for updating a reservation
@@ -99,39 +161,87 @@ class AirlineReservationGUI:
         seat_entry = ttk.Entry(dialog)  # Entry widget for new seat number
         seat_entry.grid(row=1, column=1, pady=5, padx=5)  # Place entry in the grid
         
+        def done(result):  # Runs on the Tk thread once the update is made
+            success, message = result
+            messagebox.showinfo("Update Result", message)  # Show result message
+            if success:  # If update was successful
+                if dialog.winfo_exists():  # The user may have closed it meanwhile
+                    dialog.destroy()  # Close the dialog
+
         def update():  # Inner function to perform update
             try:
                 ticket_number = ticket_entry.get()  # Get ticket number from entry
                 new_seat = int(seat_entry.get())  # Get new seat number from entry
-                if not 1 <= new_seat <= 100:  # Validate seat number range
+                if not 1 <= new_seat <= self.system.capacity:  # Validate seat number range
                     messagebox.showerror("Error", "Invalid seat number")  # Show error if invalid
                     return  # Exit function if invalid
-                success, message = self.system.update_reservation(ticket_number, new_seat)  # Attempt to update booking
-                messagebox.showinfo("Update Result", message)  # Show result message
-                if success:  # If update was successful
-                    self.update_seats_label()  # Update available seats label
-                    dialog.destroy()  # Close the dialog
+                self.submit(lambda: self.system.update_reservation(ticket_number, new_seat), done)  # Attempt to update booking
             except ValueError:  # Handle non-integer input
                 messagebox.showerror("Error", "Seat number must be a number")  # Show error if input is not a number
                 
         ttk.Button(dialog, text="Update Booking", command=update).grid(row=2, column=0, columnspan=2, pady=5)  # Button to perform update
 
-    # Method to show window seat tickets in a message box
+    # Method to show rows in a scrolling window that only renders the visible rows
+    def show_list(self, title, row_count, row_text):
+        dialog = tk.Toplevel(self.root)  # Create a new top-level window for the list
+        dialog.title(title)  # Set title for the window
+        listing = VirtualList(dialog, row_count, row_text)  # Rows are formatted only as they scroll into view
+        listing.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W), padx=5, pady=5)
+        dialog.rowconfigure(0, weight=1)  # Let the list grow with the window
+        dialog.columnconfigure(0, weight=1)
+
+    # Method to show window seat tickets in a scrolling list
     def show_window_seats(self):
-        window_seats = self.system.get_window_seats()  # Retrieve list of window seat tickets
-        if window_seats:  # Check if there are any window seats booked
-            seat_info = "\n".join([f"Seat {seat_num} : Ticket {ticket_num}" for seat_num, ticket_num in window_seats])  # Format seat info
-            messagebox.showinfo("Window Seat Tickets", seat_info)  # Show window seat tickets in a message box
-        else:
-            messagebox.showinfo("Window Seat Tickets", "No window seats are currently booked")  # Inform user if no window seats are booked
-
-    # Method to quit the application
+        def done(window_seats):  # Runs on the Tk thread with the sorted (seat, ticket) pairs
+            if window_seats:  # Check if there are any window seats booked
+                self.show_list(f"Window Seat Tickets ({len(window_seats)})", len(window_seats),
+                               lambda row: f"Seat {window_seats[row][0]} : Ticket {window_seats[row][1]}")  # Format seat info
+            else:
+                messagebox.showinfo("Window Seat Tickets", "No window seats are currently booked")  # Inform user if no window seats are booked
+
+        self.submit(self.system.get_window_seats, done)  # Retrieve list of window seat tickets
+
+    # Method to show every seat and who holds it in a scrolling list
+    def show_seat_map(self):
+        def seat_owners():  # Runs on the worker thread: the ticket holding each seat, or None
+            return [self.system.get_seat_occupant(seat) for seat in range(1, self.system.capacity + 1)]
+
+        def done(owners):  # Runs on the Tk thread with one entry per seat
+            def row_text(row):  # Format one seat
+                owner = owners[row]
+                holder = f"Ticket {owner.ticket_number} (passenger {owner.passenger_id})" if owner else "free"
+                return f"Seat {row + 1:>5} {seat_class(row + 1):<7} {holder}"
+            self.show_list(f"Seat Map ({self.system.capacity} seats)", len(owners), row_text)
+
+        self.submit(seat_owners, done)
+
+    # Method to quit the application once the final save has finished
     def quit_application(self):
-        self.system.save_reservations()
-        self.root.destroy()  # Close the main application window
+        if self.closing:  # Already saving
+            return
+
+        def finish(_):  # Runs on the Tk thread after the save, or after a failed one
+            self.worker.stop()  # Stop the worker thread
+            self.root.destroy()  # Close the main application window
+
+        def close():  # Runs on the worker thread
+            if self.system:  # Nothing to save if loading never finished
+                self.system.close()  # Save bookings and close the store
+
+        self.closing = True  # Refuse further core calls; they would run after the system is closed
+        for child in self.root.winfo_children():  # Close the open dialogs, so nothing can be submitted from them
+            if isinstance(child, tk.Toplevel):
+                child.destroy()
+        self.set_busy("Saving reservations...")  # Saving can take a while with large datasets
+        self.root.protocol("WM_DELETE_WINDOW", lambda: None)  # Ignore further close requests while saving
+        self.worker.submit(close, finish, finish)
 
 # Entry point of the application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Airline reservation GUI")
+    parser.add_argument("--db", help="SQLite database shared with other processes, instead of reservations.csv")
+    args = parser.parse_args()
+    storage = SqliteStorage(args.db, import_csv="reservations.csv") if args.db else None  # A new database starts from the CSV
     root = tk.Tk()  # Create the main window
-    app = AirlineReservationGUI(root)  # Create an instance of the AirlineReservationGUI
+    app = AirlineReservationGUI(root, storage)  # Create an instance of the AirlineReservationGUI
     root.mainloop()  # Start the GUI event loop
\ No newline at end of file
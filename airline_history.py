@@ -0,0 +1,266 @@
+# The History of the Airline Reservation System; airline_history.py
+import json  # Import json for the history file header
+import os  # Import os for replacing the history file atomically
+import threading  # Import threading for the history lock
+from array import array  # Import array for the event columns
+from bisect import bisect_left  # Import bisect for time-range selection
+from datetime import timedelta  # Import timedelta for bucket widths
+from airline_columns import ReservationColumns, to_micros, from_micros, MICROSECOND  # Import the columnar store
+from airline_inventory import SEAT_CLASSES  # Import the seat classes
+
+try:
+    import numpy as np  # Vectorized aggregation when available
+except ImportError:  # NumPy is optional; the pure-Python path gives the same answers
+    np = None
+
+# Event kinds stored in the history
+BOOKED = 0  # A ticket was booked
+CANCELLED = 1  # A ticket was cancelled
+MOVED = 2  # A ticket was moved to another seat
+
+HOUR = timedelta(hours=1)  # Default bucket width
+MAGIC = 'airline-history-1'  # Identifies a history file
+RESIDUES = bytes(value % 3 for value in range(256))  # Byte -> byte mod 3
+CLASS_OF_SUM = bytes((value - 1) % 3 for value in range(256))  # Sum of a seat's byte residues -> seat class index
+
+# Function to get one byte per seat holding its class index, (seat - 1) % 3, without a Python-level loop
+def seat_classes(seats):
+    residues = seats.tobytes().translate(RESIDUES)  # 256 % 3 == 1, so a seat's residue is the sum of its bytes' residues
+    total = sum(int.from_bytes(residues[offset::seats.itemsize], 'little')  # Add the residues of all bytes of each seat;
+                for offset in range(seats.itemsize))  # every sum stays below 256, so no digit carries into the next
+    return total.to_bytes(len(seats), 'little').translate(CLASS_OF_SUM)
+
+# Function to combine two byte strings of small values into one of high * 3 + low, without a Python-level loop
+def combine(high, low):
+    return (int.from_bytes(high, 'little') * 3 + int.from_bytes(low, 'little')).to_bytes(len(high), 'little')
+
+# Class for the time-ordered history of bookings, cancellations and seat moves
+class ReservationHistory:
+    def __init__(self):
+        self.times = array('q')  # Event time, microseconds since the epoch
+        self.kinds = array('b')  # BOOKED, CANCELLED or MOVED
+        self.seats = array('i')  # Seat booked, freed, or moved to
+        self.old_seats = array('i')  # Seat moved from, 0 for other events
+        self.cancelled = ReservationColumns()  # Every cancelled reservation, with its cancellation time
+        self._in_order = True  # Whether the event columns are sorted by time
+        self._loader = None  # Function returning the history recorded before this one, read on first use
+        self._lock = threading.Lock()  # Keeps the columns the same length under concurrent appends
+
+    # Method to add an event
+    def record(self, kind, moment, seat, old_seat=0):
+        micros = to_micros(moment)
+        with self._lock:
+            if self.times and micros < self.times[-1]:  # Loaded or concurrent events can arrive out of order
+                self._in_order = False
+            self.times.append(micros)
+            self.kinds.append(kind)
+            self.seats.append(seat)
+            self.old_seats.append(old_seat)
+
+    # Method to record a booking
+    def record_booking(self, reservation):
+        self.record(BOOKED, reservation.reservation_time, reservation.seat_number)
+
+    # Method to record a cancellation and keep the cancelled reservation
+    def record_cancellation(self, reservation):
+        self.record(CANCELLED, reservation.cancellation_time, reservation.seat_number)
+        with self._lock:
+            self.cancelled.append(reservation)
+
+    # Method to record a seat move
+    def record_move(self, moment, old_seat, new_seat):
+        self.record(MOVED, moment, new_seat, old_seat)
+
+    # Method to count the events
+    def __len__(self):
+        with self._lock:
+            self._load_deferred()
+            return len(self.times)
+
+    # Method to get views of every cancelled reservation recorded so far
+    def cancelled_reservations(self):
+        with self._lock:  # Rows below this count are complete
+            self._load_deferred()
+            count = len(self.cancelled)
+        return [self.cancelled[row] for row in range(count)]
+
+    # Method to count the cancelled reservations
+    def cancelled_count(self):
+        with self._lock:
+            self._load_deferred()
+            return len(self.cancelled)
+
+    # Method to get the ticket numbers of every cancelled reservation
+    def cancelled_tickets(self):
+        with self._lock:
+            self._load_deferred()
+            count = len(self.cancelled)
+        return {self.cancelled.ticket_number(row) for row in range(count)}
+
+    # Method to put off loading the earlier history until it is first needed; events recorded meanwhile are kept
+    def defer(self, loader):
+        self._loader = loader
+
+    # Method to put the deferred history in front of the events recorded since (called with the lock held)
+    def _load_deferred(self):
+        if self._loader is None:
+            return
+        loader, self._loader = self._loader, None
+        earlier = loader()
+        if earlier.times and self.times and earlier.times[-1] > self.times[0]:
+            self._in_order = False
+        self._in_order = self._in_order and earlier._in_order
+        for name in ('times', 'kinds', 'seats', 'old_seats'):
+            setattr(self, name, getattr(earlier, name) + getattr(self, name))
+        shift = len(earlier.cancelled)  # Rows recorded since move down by the number loaded
+        later, self.cancelled = self.cancelled, earlier.cancelled
+        for name in ('passenger_ids', 'ticket_codes', 'seat_numbers', 'reservation_times', 'cancellation_times'):
+            getattr(self.cancelled, name).extend(getattr(later, name))
+        self.cancelled.other_tickets.update({row + shift: ticket for row, ticket in later.other_tickets.items()})
+
+    # Method to sort the event columns by time if needed (a stable sort, so same-time events keep their order)
+    def _sort(self):
+        if self._in_order:
+            return
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        for name in ('times', 'kinds', 'seats', 'old_seats'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in order)))
+        self._in_order = True
+
+    # Method to turn an optional time range into event positions and bucket parameters
+    def _window(self, start, end, bucket):
+        width = bucket // MICROSECOND  # Bucket width in microseconds
+        low = 0 if start is None else bisect_left(self.times, to_micros(start))
+        high = len(self.times) if end is None else bisect_left(self.times, to_micros(end))
+        if start is not None:
+            origin = to_micros(start)
+        elif low < high:  # Align the first bucket to a whole multiple of the width
+            origin = self.times[low] - self.times[low] % width
+        else:
+            origin = 0
+        last = to_micros(end) - 1 if end is not None else (self.times[high - 1] if low < high else origin)
+        return low, high, origin, width, max(0, (last - origin) // width + 1)
+
+    # Method to count events of one kind per bucket over positions low..high
+    def _bucket_counts(self, kind, low, high, origin, width, buckets):
+        if np is not None:  # Vectorized: mask, shift, divide and bincount
+            times = np.frombuffer(self.times[low:high], dtype=np.int64)
+            kinds = np.frombuffer(self.kinds[low:high], dtype=np.int8)
+            return np.bincount((times[kinds == kind] - origin) // width, minlength=buckets)[:buckets].tolist()
+        counts = []
+        kinds, target = self.kinds[low:high].tobytes(), bytes((kind,))  # One byte per event
+        start = low
+        for index in range(1, buckets + 1):  # The events are sorted, so each bucket is a run found by bisection
+            stop = bisect_left(self.times, origin + index * width, low, high)
+            counts.append(kinds.count(target, start - low, stop - low))
+            start = stop
+        return counts
+
+    # Method to count events of one kind before a position
+    def _count_before(self, kind, high):
+        if np is not None:
+            return int(np.count_nonzero(np.frombuffer(self.kinds[:high], dtype=np.int8) == kind))
+        return self.kinds[:high].tobytes().count(bytes((kind,)))  # One byte per event
+
+    # Method to get (bucket start, count) pairs for one kind of event
+    def per_bucket(self, kind, start=None, end=None, bucket=HOUR):
+        with self._lock:
+            self._load_deferred()
+            self._sort()
+            low, high, origin, width, buckets = self._window(start, end, bucket)
+            counts = self._bucket_counts(kind, low, high, origin, width, buckets)
+        return [(from_micros(origin + index * width), count) for index, count in enumerate(counts)]
+
+    # Method to get bookings per hour
+    def bookings_per_hour(self, start=None, end=None):
+        return self.per_bucket(BOOKED, start, end)
+
+    # Method to get cancellations per hour
+    def cancellations_per_hour(self, start=None, end=None):
+        return self.per_bucket(CANCELLED, start, end)
+
+    # Method to get (bucket end, booked seats / capacity) pairs
+    def load_factor(self, capacity, start=None, end=None, bucket=HOUR):
+        with self._lock:
+            self._load_deferred()
+            self._sort()
+            low, high, origin, width, buckets = self._window(start, end, bucket)
+            booked = self._bucket_counts(BOOKED, low, high, origin, width, buckets)
+            cancelled = self._bucket_counts(CANCELLED, low, high, origin, width, buckets)
+            occupied = self._count_before(BOOKED, low) - self._count_before(CANCELLED, low)  # Seats taken before the range
+        if np is not None:
+            occupancy = (occupied + np.cumsum(np.array(booked) - np.array(cancelled))).tolist()
+        else:
+            occupancy = []
+            for added, removed in zip(booked, cancelled):
+                occupied += added - removed
+                occupancy.append(occupied)
+        return [(from_micros(origin + (index + 1) * width), seats / capacity) for index, seats in enumerate(occupancy)]
+
+    # Method to count bookings, cancellations and moves in and out of each seat class
+    def churn_by_seat_class(self, start=None, end=None):
+        with self._lock:
+            self._load_deferred()
+            self._sort()
+            low, high, _, _, _ = self._window(start, end, HOUR)
+            kinds, seats, old_seats = self.kinds[low:high], self.seats[low:high], self.old_seats[low:high]
+        if np is not None:
+            kinds = np.frombuffer(kinds, dtype=np.int8)
+            classes = (np.frombuffer(seats, dtype=np.int32) - 1) % 3
+            old_classes = (np.frombuffer(old_seats, dtype=np.int32) - 1) % 3
+            counts = {name: np.bincount(source[kinds == kind], minlength=3).tolist() for name, kind, source in (
+                ('bookings', BOOKED, classes), ('cancellations', CANCELLED, classes),
+                ('moves_in', MOVED, classes), ('moves_out', MOVED, old_classes))}
+        else:  # One byte of kind * 3 + seat class per event, counted with bytes.count
+            kinds = kinds.tobytes()
+            codes, old_codes = combine(kinds, seat_classes(seats)), combine(kinds, seat_classes(old_seats))
+            counts = {name: [source.count(bytes((kind * 3 + index,))) for index in range(3)] for name, kind, source in (
+                ('bookings', BOOKED, codes), ('cancellations', CANCELLED, codes),
+                ('moves_in', MOVED, codes), ('moves_out', MOVED, old_codes))}
+        return {cls: {name: values[index] for name, values in counts.items()} for index, cls in enumerate(SEAT_CLASSES)}
+
+    # Method to copy every column at the same moment; returns (header, columns) for save
+    def capture(self):
+        with self._lock:
+            self._load_deferred()
+            columns = [column[:] for column in (
+                self.times, self.kinds, self.seats, self.old_seats, self.cancelled.passenger_ids,
+                self.cancelled.ticket_codes, self.cancelled.seat_numbers, self.cancelled.reservation_times,
+                self.cancelled.cancellation_times)]
+            header = {'magic': MAGIC, 'lengths': [len(column) for column in columns],
+                      'typecodes': [column.typecode for column in columns],
+                      'other_tickets': dict(self.cancelled.other_tickets), 'in_order': self._in_order}
+        return header, columns
+
+    # Method to write the history, or a copy taken earlier with capture, to a file atomically
+    def save(self, path, captured=None):
+        header, columns = captured or self.capture()  # Copy first, then write without blocking appends
+        temp_file = path + ".tmp"  # Write beside the history so the rename is atomic
+        with open(temp_file, 'wb') as file:
+            file.write(json.dumps(header).encode() + b"\n")  # One-line header
+            for column in columns:  # Raw column data
+                column.tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, path)  # Swap in the new history
+
+    # Method to read a history written by save
+    @classmethod
+    def load(cls, path):
+        history = cls()
+        with open(path, 'rb') as file:
+            header = json.loads(file.readline())
+            if header.get('magic') != MAGIC:
+                raise ValueError(f"{path} is not a reservation history file")
+            columns = []
+            for length, typecode in zip(header['lengths'], header['typecodes']):
+                column = array(typecode)
+                column.fromfile(file, length)  # Read the column in one call
+                columns.append(column)
+        (history.times, history.kinds, history.seats, history.old_seats, history.cancelled.passenger_ids,
+         history.cancelled.ticket_codes, history.cancelled.seat_numbers, history.cancelled.reservation_times,
+         history.cancelled.cancellation_times) = columns
+        history.cancelled.other_tickets = {int(row): ticket for row, ticket in header['other_tickets'].items()}
+        history._in_order = header['in_order']
+        return history
@@ -0,0 +1,95 @@
+# The ID Generator of the Airline Reservation System; airline_ids.py
+import os  # Import os for opening and syncing the counter file
+import threading  # Import threading for the allocator lock
+
+try:
+    import fcntl  # POSIX file locking
+except ImportError:  # Windows has no fcntl
+    fcntl = None
+    import msvcrt  # Windows file locking
+
+# Function to take an exclusive lock on an open file, waiting if another process holds it
+def lock_file(file):
+    if fcntl:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # Lock the first byte; retries for up to 10 s
+
+# Function to release a lock taken with lock_file
+def unlock_file(file):
+    if fcntl:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Class for handing out unique, increasing IDs in O(1), leased in blocks from a counter file shared by processes
+class IdAllocator:
+    def __init__(self, counter_file=None, block_size=1000, start=100):
+        self.counter_file = counter_file  # File holding the next unleased ID, or None for a process-local counter
+        self.block_size = block_size  # Number of IDs leased from the counter file at a time
+        self._floor = start  # Lowest ID that may still be handed out
+        self._next = start  # Next ID in the current block
+        self._limit = start  # End of the current block (exclusive)
+        self._lock = threading.Lock()  # Serializes allocation between threads
+
+    # Method to get the next unique ID
+    def next_id(self):
+        with self._lock:  # Two threads must not take the same ID
+            if self._next >= self._limit:  # The current block is used up
+                self._lease(1)
+            value = self._next  # Take the next ID in the block
+            self._next += 1
+            return value
+
+    # Method to get a list of n unique IDs in one step
+    def next_ids(self, n):
+        if n < 0:  # A negative count would move the counter backwards and reuse IDs
+            raise ValueError(f"Cannot allocate {n} IDs")
+        with self._lock:  # Two threads must not take the same IDs
+            if self._limit - self._next < n:  # Not enough left in the current block
+                self._lease(n)
+            start = self._next  # Take n consecutive IDs
+            self._next += n
+            return list(range(start, start + n))
+
+    # Method to get the highest ID handed out or observed so far
+    @property
+    def last_id(self):
+        return max(self._floor, self._next) - 1
+
+    # Method to get how many IDs are left in the current block
+    @property
+    def remaining(self):
+        return max(0, self._limit - max(self._next, self._floor))
+
+    # Method to make sure IDs already in use (e.g. loaded from a file) are never handed out again
+    def observe(self, value):
+        with self._lock:
+            if value >= self._floor:  # Raise the floor past the observed ID
+                self._floor = value + 1
+            if self._next < self._floor:  # The current block overlaps used IDs; drop it
+                self._next = self._limit = self._floor
+
+    # Method to lease a new block holding at least n IDs
+    def _lease(self, n):
+        size = max(n, self.block_size)  # Lease whole blocks, or more for a large batch
+        if self.counter_file is None:  # A process-local counter needs no lease
+            self._next = max(self._limit, self._floor)
+            self._limit = self._next + size
+            return
+        fd = os.open(self.counter_file, os.O_RDWR | os.O_CREAT, 0o644)  # Open or create the counter file
+        with os.fdopen(fd, 'r+') as file:
+            lock_file(file)  # Other processes wait here until this lease is recorded
+            try:
+                file.seek(0)
+                text = file.read().strip()  # The next unleased ID, or empty for a new file
+                start = max(int(text) if text else 0, self._floor)  # Never go below IDs already in use
+                file.seek(0)
+                file.write(f"{start + size:020d}\n")  # Fixed width, so the file never needs truncating
+                file.flush()  # Hand the new value to the OS
+                os.fsync(file.fileno())  # Make the lease durable before any ID from it is used
+            finally:
+                unlock_file(file)  # Let other processes lease
+        self._next, self._limit = start, start + size  # Use the leased block
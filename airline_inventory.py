@@ -0,0 +1,205 @@
+# The Inventory of the Airline Reservation System; airline_inventory.py
+import random  # Import the random module for random seat picks
+import threading  # Import threading for the per-flight lock
+from array import array  # Import array for compact free-seat pools
+
+# Seat classes, in the order they repeat across a row (seat 1 is a window seat)
+WINDOW = 'window'
+MIDDLE = 'middle'
+AISLE = 'aisle'
+SEAT_CLASSES = (WINDOW, MIDDLE, AISLE)
+LOWEST = 'lowest'  # Preference for the lowest-numbered free seat
+
+# Function to get the class of a seat
+def seat_class(seat):
+    return SEAT_CLASSES[(seat - 1) % 3]  # Window, middle and aisle seats repeat every three seats
+
+# Class for a compact bitmap of the free seats in one cabin
+class SeatMap:
+    __slots__ = ('capacity', 'bits', 'free_count')
+
+    def __init__(self, capacity):
+        if capacity < 1:  # A cabin needs at least one seat
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity  # Number of seats in the cabin, numbered 1..capacity
+        self.bits = bytearray(b'\xff') * (capacity // 8 + 1)  # One bit per seat number, set while the seat is free
+        self.bits[0] &= 0xFE  # There is no seat 0
+        for seat in range(capacity + 1, len(self.bits) * 8):  # Clear the padding bits past the last seat
+            self.bits[seat >> 3] &= ~(1 << (seat & 7)) & 0xFF
+        self.free_count = capacity  # Number of free seats, kept so counting is O(1)
+
+    # Method to check whether a seat exists and is free
+    def is_free(self, seat):
+        return 0 < seat <= self.capacity and bool(self.bits[seat >> 3] & (1 << (seat & 7)))  # Test the seat's bit
+
+    # Method to take a seat if it is free; returns False if it was already taken
+    def claim(self, seat):
+        if not self.is_free(seat):  # Refuse seats that are taken or do not exist
+            return False
+        self.bits[seat >> 3] &= ~(1 << (seat & 7)) & 0xFF  # Clear the seat's bit
+        self.free_count -= 1  # One less free seat
+        return True
+
+    # Method to give a seat back; returns False if it was already free
+    def release(self, seat):
+        if not 0 < seat <= self.capacity or self.is_free(seat):  # Refuse seats that are free or do not exist
+            return False
+        self.bits[seat >> 3] |= 1 << (seat & 7)  # Set the seat's bit
+        self.free_count += 1  # One more free seat
+        return True
+
+    # Method to move a passenger from one seat to another free seat
+    def move(self, old_seat, new_seat):
+        if not self.claim(new_seat):  # Take the new seat first so a failure leaves the map unchanged
+            return False
+        self.release(old_seat)  # Free the old seat
+        return True
+
+    # Method to replace the whole map with a bitmap saved earlier
+    def load_bits(self, bits):
+        if len(bits) != len(self.bits):  # The bitmap must be for a cabin of the same size
+            raise ValueError("Bitmap does not match the cabin size")
+        self.bits[:] = bits  # Copy the saved bitmap in one step
+        self.free_count = int.from_bytes(self.bits, 'little').bit_count()  # Count the free seats
+
+    # Method to find the lowest-numbered free seat
+    def lowest_free(self):
+        bits = int.from_bytes(self.bits, 'little')  # View the whole bitmap as one integer
+        if not bits:  # Check if there are no free seats
+            return None
+        return (bits & -bits).bit_length() - 1  # Isolate the lowest set bit
+
+    # Method to iterate over the free seats in ascending order
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):  # Skip whole bytes of taken seats at once
+            while byte:
+                low = byte & -byte  # Isolate the lowest free seat in this byte
+                yield (index << 3) + low.bit_length() - 1  # Return the seat number
+                byte ^= low  # Move on to the next free seat
+
+    # Method to count the free seats
+    def __len__(self):
+        return self.free_count
+
+    # Method to support "seat in seat_map"
+    def __contains__(self, seat):
+        return self.is_free(seat)
+
+# Class for a seat map that can also pick a free seat in O(1)
+class SeatPool(SeatMap):
+    __slots__ = ('pools', 'positions')
+
+    def __init__(self, capacity):
+        super().__init__(capacity)  # Start with every seat free
+        self.pools = [array('I', range(first, capacity + 1, 3)) for first in (1, 2, 3)]  # Free seats per seat class
+        self.positions = array('I', bytes(4 * (capacity + 1)))  # Index of each free seat within its class pool
+        for first, pool in zip((1, 2, 3), self.pools):  # Record where every seat sits in its pool
+            self.positions[first::3] = array('I', range(len(pool)))
+
+    # Method to take a seat if it is free; returns False if it was already taken
+    def claim(self, seat):
+        if not super().claim(seat):  # Update the bitmap first
+            return False
+        pool = self.pools[(seat - 1) % 3]  # Pool of the seat's class
+        last = pool.pop()  # Swap-remove: take the last free seat of the pool...
+        if last != seat:  # ...and move it into the claimed seat's slot
+            index = self.positions[seat]
+            pool[index] = last
+            self.positions[last] = index
+        return True
+
+    # Method to give a seat back; returns False if it was already free
+    def release(self, seat):
+        if not super().release(seat):  # Update the bitmap first
+            return False
+        pool = self.pools[(seat - 1) % 3]  # Pool of the seat's class
+        self.positions[seat] = len(pool)  # The seat goes at the end of its pool
+        pool.append(seat)
+        return True
+
+    # Method to replace the whole map with a bitmap saved earlier and rebuild the pools from it
+    def load_bits(self, bits):
+        super().load_bits(bits)  # Load the bitmap
+        self.pools = [array('I') for _ in SEAT_CLASSES]  # Start with empty pools
+        for seat in self:  # Only free seats are visited
+            pool = self.pools[(seat - 1) % 3]
+            self.positions[seat] = len(pool)
+            pool.append(seat)
+
+    # Method to pick a free seat at random without claiming it
+    def pick_random(self, rng=random):
+        if not self.free_count:  # Check if there are no free seats
+            return None
+        index = rng.randrange(self.free_count)  # Every free seat is equally likely
+        for pool in self.pools:  # Find the pool that holds the chosen index
+            if index < len(pool):
+                return pool[index]
+            index -= len(pool)
+
+    # Method to pick a free seat according to a preference without claiming it
+    def pick(self, preference=None, rng=random):
+        if preference == LOWEST:  # Lowest-numbered free seat
+            return self.lowest_free()
+        if preference in SEAT_CLASSES:  # Random seat of the preferred class, if any is left
+            pool = self.pools[SEAT_CLASSES.index(preference)]
+            if pool:
+                return pool[rng.randrange(len(pool))]
+        return self.pick_random(rng)  # No preference, or the preferred class is full
+
+# Class to represent a single flight and its cabin
+class Flight:
+    __slots__ = ('flight_id', 'capacity', 'seats', 'lock')
+
+    def __init__(self, flight_id, capacity, pooled=False):
+        self.flight_id = flight_id  # Identifier of the flight
+        self.capacity = capacity  # Number of seats on the aircraft
+        self.seats = SeatPool(capacity) if pooled else SeatMap(capacity)  # Free seats, with O(1) picks if pooled
+        self.lock = threading.Lock()  # Guards the seat map; flights never share a lock
+
+    # Method to claim a specific seat, safe to call from many threads
+    def claim_seat(self, seat):
+        with self.lock:  # Compare-and-claim under the flight's own lock
+            return self.seats.claim(seat)
+
+    # Method to release a seat, safe to call from many threads
+    def release_seat(self, seat):
+        with self.lock:  # Only this flight is blocked
+            return self.seats.release(seat)
+
+    # Method to move a passenger to another seat, safe to call from many threads
+    def move_seat(self, old_seat, new_seat):
+        with self.lock:  # Claim the new seat and free the old one as one step
+            return self.seats.move(old_seat, new_seat)
+
+# Class for managing the seat inventory of many flights
+class FlightInventory:
+    def __init__(self):
+        self.flights = {}  # Dictionary of flights with flight_id as key
+
+    # Method to add a flight with the given cabin size
+    def add_flight(self, flight_id, capacity, pooled=False):
+        if flight_id in self.flights:  # Check if the flight already exists
+            raise ValueError(f"Flight {flight_id} already exists")
+        flight = Flight(flight_id, capacity, pooled)  # Create the flight with an empty cabin
+        self.flights[flight_id] = flight  # Store the flight
+        return flight
+
+    # Method to remove a flight from the inventory
+    def remove_flight(self, flight_id):
+        return self.flights.pop(flight_id, None)  # Return the removed flight, or None if not found
+
+    # Method to retrieve a flight using its ID
+    def get_flight(self, flight_id):
+        return self.flights.get(flight_id)  # Return the flight if found
+
+    # Method to count how many seats are available on a flight
+    def get_available_seats_count(self, flight_id):
+        return self.flights[flight_id].seats.free_count  # Return the number of available seats
+
+    # Method to count how many flights are in the inventory
+    def __len__(self):
+        return len(self.flights)
+
+    # Method to support "flight_id in inventory"
+    def __contains__(self, flight_id):
+        return flight_id in self.flights
@@ -0,0 +1,184 @@
+# The Journal of the Airline Reservation System; airline_journal.py
+import csv  # Import the csv module for encoding journal records
+import io  # Import io for building a batch of records in memory
+import os  # Import os module for fsync, rename and file removal
+import threading  # Import threading for the background sync/compaction worker
+import time  # Import time for measuring the compaction interval
+
+# Operation codes written as the first field of every journal record
+OP_BOOK = 'B'  # A ticket was booked
+OP_CANCEL = 'C'  # A ticket was cancelled
+OP_UPDATE = 'U'  # A ticket was moved to another seat
+OP_BATCH = 'T'  # The next N records form one all-or-nothing batch
+
+# Class for the append-only write-ahead log that sits beside the CSV snapshot
+class ReservationJournal:
+    def __init__(self, log_file, sync_every=32, sync_interval=0.05,
+                 compactor=None, compact_every=10000, compact_interval=300.0):
+        self.log_file = log_file  # Path of the live journal
+        self.rotated_file = log_file + '.old'  # Path of the journal being folded into a snapshot
+        self.sync_every = sync_every  # Number of records after which an fsync is forced
+        self.sync_interval = sync_interval  # Seconds between background group fsyncs
+        self.compactor = compactor  # Callable that writes a full snapshot, or None for no compaction
+        self.compact_every = compact_every  # Number of records that triggers a compaction
+        self.compact_interval = compact_interval  # Seconds after which a non-empty journal is compacted
+        self._lock = threading.Lock()  # Serializes appends, fsyncs and rotation
+        self._compact_lock = threading.Lock()  # Ensures only one compaction runs at a time
+        self._sync_lock = threading.Lock()  # Ensures a caller of sync() returns only after its records are durable
+        for path in (self.rotated_file, self.log_file):  # New records must not be glued onto, or counted into, a torn write
+            self._truncate_torn(path)
+        self._file = open(self.log_file, 'a', newline='')  # Open the journal for appending
+        self._writer = csv.writer(self._file)  # CSV writer bound to the journal
+        self._pending = 0  # Records written since the last fsync
+        self._records = sum(1 for _ in self.read_records())  # Records not yet folded into the snapshot
+        self._last_compaction = time.monotonic()  # Time of the last compaction
+        self._stop = threading.Event()  # Signals the background worker to exit
+        self._thread = None  # Background worker, started once the owner has finished loading
+
+    # Method to start group fsync and periodic compaction; call it only after the journal has been replayed
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)  # Background worker
+            self._thread.start()
+
+    # Method to append one record to the journal
+    def append(self, op, passenger_id, ticket_number, seat_number, timestamp):
+        with self._lock:  # Keep the record and its bookkeeping together
+            self._writer.writerow([op, passenger_id, ticket_number, seat_number, timestamp.isoformat()])  # Write the record
+            self._file.flush()  # Hand the record to the OS so a process crash does not lose it
+            self._count_locked(1)  # Update the group and compaction counters
+
+    # Method to append a batch of (op, passenger_id, ticket_number, seat_number, timestamp) records in one write
+    def append_many(self, records):
+        buffer = io.StringIO()  # Encode the whole batch before touching the file
+        writer = csv.writer(buffer)
+        writer.writerow([OP_BATCH, len(records), '', 0, ''])  # Header so replay can drop a torn batch
+        writer.writerows([op, passenger_id, ticket_number, seat_number, timestamp.isoformat()]
+                         for op, passenger_id, ticket_number, seat_number, timestamp in records)
+        with self._lock:  # Keep the batch and its bookkeeping together
+            self._file.write(buffer.getvalue())  # Write the batch
+            self._file.flush()  # Hand the batch to the OS in a single write
+            self._count_locked(len(records))  # Update the group and compaction counters
+
+    # Method to count appended records while the journal lock is held
+    def _count_locked(self, count):
+        self._pending += count  # Count the records towards the next group fsync
+        self._records += count  # Count the records towards the next compaction
+        if self._pending >= self.sync_every:  # Force an fsync once the group is full
+            self._sync_locked()
+
+    # Method to fsync every record written so far without blocking appends
+    def sync(self):
+        with self._sync_lock:  # Wait for any fsync already in progress
+            with self._lock:  # Take the outstanding group
+                if not self._pending:  # Skip the system call when nothing is outstanding
+                    return
+                self._pending = 0  # Appends from now on belong to the next group
+                fd = os.dup(self._file.fileno())  # Keep the file open even if it is rotated meanwhile
+            try:
+                os.fsync(fd)  # Make the group durable while appends continue
+            finally:
+                os.close(fd)  # Release the duplicate descriptor
+
+    # Method to fsync while the journal lock is already held
+    def _sync_locked(self):
+        if self._pending:  # Skip the system call when nothing is outstanding
+            os.fsync(self._file.fileno())  # Make the group durable
+            self._pending = 0  # Reset the group counter
+
+    # Method to cut a torn trailing write off a journal file: a partial line, or a batch missing some of its records
+    @staticmethod
+    def _truncate_torn(path):
+        if not os.path.exists(path):  # Nothing to repair
+            return
+        with open(path, 'r+b') as file:
+            data = file.read()
+            end = offset = 0  # End of the last complete record or batch, and of the line being read
+            remaining = 0  # Records the current batch still expects
+            for line in data.splitlines(keepends=True):
+                if not line.endswith(b'\n'):  # A partial line
+                    break
+                offset += len(line)
+                row = next(csv.reader([line.decode('utf-8', 'replace')]), [])
+                if len(row) == 5 and row[0] == OP_BATCH:  # A new batch header; an unfinished batch before it stays cut
+                    remaining = int(row[1])
+                elif remaining and len(row) == 5 and row[0] in (OP_BOOK, OP_CANCEL, OP_UPDATE):  # A record of the batch
+                    remaining -= 1
+                if not remaining:  # Everything up to here is complete
+                    end = offset
+            if end < len(data):  # The last write was cut off by a crash
+                file.truncate(end)
+                file.flush()
+                os.fsync(file.fileno())  # Make the repair durable before appending after it
+
+    # Method to read back every record not yet folded into the snapshot
+    def read_records(self):
+        for path in (self.rotated_file, self.log_file):  # A crashed compaction may leave a rotated journal
+            if not os.path.exists(path):  # Skip journals that do not exist
+                continue
+            with open(path, 'r', newline='') as file:  # Open the journal for reading
+                batch, remaining = [], 0  # Records of the batch being read, and how many are still expected
+                for row in csv.reader(file):  # Iterate through each record
+                    if len(row) == 5 and row[0] == OP_BATCH:  # Start of a batch; an unfinished one is dropped
+                        batch, remaining = [], int(row[1])
+                        continue
+                    if len(row) != 5 or row[0] not in (OP_BOOK, OP_CANCEL, OP_UPDATE):  # Skip a torn trailing write
+                        continue
+                    record = row[0], int(row[1]), row[2], int(row[3]), row[4]  # Decode the record
+                    if not remaining:  # A single record
+                        yield record
+                        continue
+                    batch.append(record)  # Hold batch records until the whole batch has been read
+                    remaining -= 1
+                    if not remaining:  # The batch is complete
+                        yield from batch
+                        batch = []
+
+    # Method to fold the journal into a fresh snapshot
+    def compact(self):
+        if self.compactor is None:  # Nothing to do without a snapshot writer
+            return
+        with self._compact_lock:  # Only one compaction at a time
+            self._rotate()  # Move the current records aside so appends can continue
+            self.compactor()  # Write the snapshot, which already contains the rotated records
+            os.remove(self.rotated_file)  # The rotated records are now part of the snapshot
+            self._last_compaction = time.monotonic()  # Remember when the journal was last compacted
+
+    # Method to move the live journal aside and start an empty one
+    def _rotate(self):
+        with self._lock:  # Block appends only for the duration of the rename
+            self._sync_locked()  # Make everything written so far durable
+            self._file.close()  # Close the live journal
+            if os.path.exists(self.rotated_file):  # A previous compaction crashed before finishing
+                with open(self.log_file, 'r', newline='') as src, open(self.rotated_file, 'a', newline='') as dst:
+                    dst.write(src.read())  # Keep the leftover records ahead of the new ones
+                    dst.flush()  # Hand the merged records to the OS
+                    os.fsync(dst.fileno())  # Make the merged journal durable
+                os.remove(self.log_file)  # The live records now live in the rotated journal
+            else:
+                os.replace(self.log_file, self.rotated_file)  # Atomically move the journal aside
+            self._file = open(self.log_file, 'a', newline='')  # Start a new, empty journal
+            self._writer = csv.writer(self._file)  # Rebind the CSV writer
+            self._records = 0  # The new journal holds no records yet
+
+    # Method run by the background worker
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):  # Wake up once per sync interval
+            self.sync()  # Group fsync of everything appended since the last wake-up
+            if self.compactor is None or not self._records:  # Nothing to compact
+                continue
+            overdue = time.monotonic() - self._last_compaction >= self.compact_interval  # Check the compaction timer
+            if self._records >= self.compact_every or overdue:  # Compact when the journal is long or old
+                try:
+                    self.compact()  # Fold the journal into a snapshot
+                except Exception as e:  # Keep the worker and its group fsyncs alive; the journal still holds every record
+                    print(f"Error compacting journal: {e}")  # Print error message
+
+    # Method to stop the background worker and close the journal
+    def close(self):
+        self._stop.set()  # Ask the worker to exit
+        if self._thread is not None:
+            self._thread.join()  # Wait for it to finish
+        with self._lock:  # Do not race with a late append
+            self._sync_locked()  # Flush the final group
+            self._file.close()  # Close the journal file
@@ -0,0 +1,205 @@
+# The Metrics of the Airline Reservation System; airline_metrics.py
+import functools  # Import functools for wrapping instrumented methods
+import json  # Import json for the JSON dump
+import os  # Import os for shortening file names in profiles
+import sys  # Import sys for sampling thread stacks
+import threading  # Import threading for the metric locks and the profiler thread
+from array import array  # Import array for the histogram buckets
+from collections import Counter  # Import Counter for profiler samples
+from time import perf_counter  # Import perf_counter for timing operations
+
+BUCKETS = 32  # Latency buckets; bucket i counts latencies below 2**i microseconds, the last one everything above
+PERCENTILES = (50, 90, 99)  # Percentiles included in every dump
+
+# Class for a latency histogram with power-of-two microsecond buckets
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = array('q', bytes(8 * BUCKETS))  # Count per bucket
+        self.count = 0  # Number of recorded latencies
+        self.total = 0.0  # Sum of the recorded latencies, seconds
+        self.max = 0.0  # Largest recorded latency, seconds
+        self._lock = threading.Lock()  # Keeps the totals and buckets consistent
+
+    # Method to record one latency in seconds
+    def record(self, seconds):
+        bucket = min(int(seconds * 1000000).bit_length(), BUCKETS - 1)  # Power-of-two bucket, no logarithm needed
+        with self._lock:
+            self.buckets[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    # Method to estimate a percentile in seconds, interpolating within the bucket that holds it
+    def percentile(self, p):
+        with self._lock:
+            target = self.count * p / 100  # Number of latencies at or below the percentile
+            seen = 0
+            for bucket, count in enumerate(self.buckets):
+                if count and seen + count >= target:
+                    low, high = (1 << bucket >> 1), 1 << bucket  # Bucket edges in microseconds
+                    return min((low + (high - low) * (target - seen) / count) / 1000000, self.max)
+                seen += count
+            return self.max
+
+    # Method to summarize the histogram as a dictionary
+    def summary(self):
+        summary = {'count': self.count, 'mean_ms': self.total / self.count * 1000 if self.count else 0.0}
+        for p in PERCENTILES:
+            summary[f'p{p}_ms'] = self.percentile(p) * 1000
+        summary['max_ms'] = self.max * 1000
+        return summary
+
+# Class for a sampling profiler that records where every other thread is running
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval  # Seconds between samples
+        self.samples = 0  # Number of samples taken
+        self.own = Counter()  # Samples in which a function was running
+        self.total = Counter()  # Samples in which a function was on the stack
+        self._stop = threading.Event()  # Set to stop the sampling thread
+        self._lock = threading.Lock()  # Keeps readers from seeing the counters mid-update
+        self._thread = None  # The sampling thread, while running
+
+    # Method to start sampling
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+            self._thread.start()
+
+    # Method to stop sampling
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    # Method to take samples until stopped
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():  # Stacks of every thread at this moment
+                if thread_id == me:  # Do not profile the profiler
+                    continue
+                running = self._where(frame)
+                seen = set()  # Count recursive functions once per sample
+                while frame is not None:
+                    seen.add(self._where(frame))
+                    frame = frame.f_back
+                with self._lock:
+                    self.own[running] += 1
+                    self.total.update(seen)
+            self.samples += 1
+
+    # Method to name the function a frame is running
+    @staticmethod
+    def _where(frame):
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+    # Method to get the functions seen most often, as (function, own samples, total samples)
+    def top(self, n=10):
+        with self._lock:
+            return [(where, own, self.total[where]) for where, own in self.own.most_common(n)]
+
+# Class for collecting counters, latency histograms and gauges
+class Metrics:
+    def __init__(self):
+        self.counters = Counter()  # Event counts by name
+        self.histograms = {}  # LatencyHistogram by operation name
+        self.gauges = {}  # Function returning the current value, by name
+        self.profiler = None  # SamplingProfiler, while one has been started
+        self._lock = threading.Lock()  # Guards the counters and the creation of histograms
+
+    # Method to add to a counter
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    # Method to record the latency of one operation
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:  # First call for this operation
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        histogram.record(seconds)
+
+    # Method to register a gauge, read only when the metrics are dumped
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    # Method to start the sampling profiler
+    def start_profiler(self, interval=0.005):
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval)
+        self.profiler.start()
+
+    # Method to stop the sampling profiler, keeping its samples for the dump
+    def stop_profiler(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    # Method to clear every counter and histogram (gauges are live and are kept)
+    def reset(self):
+        self.stop_profiler()  # A new profile starts with the next start_profiler
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+        self.profiler = None
+
+    # Method to get every metric as a JSON-friendly dictionary
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        snapshot = {
+            'counters': counters,
+            'latency': {name: histogram.summary() for name, histogram in sorted(histograms.items())},
+            'gauges': {name: read() for name, read in sorted(self.gauges.items())},
+        }
+        if self.profiler is not None:  # Include the profile once profiling has been started
+            snapshot['profile'] = {'samples': self.profiler.samples,
+                                   'top': [list(entry) for entry in self.profiler.top()]}
+        return snapshot
+
+    # Method to dump every metric as JSON
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    # Method to dump every metric as readable text
+    def to_text(self):
+        snapshot = self.snapshot()
+        lines = ["Latency (ms):"]
+        lines.append(f"  {'operation':<24}{'count':>10}{'mean':>10}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'max':>10}")
+        for name, summary in snapshot['latency'].items():
+            lines.append(f"  {name:<24}{summary['count']:>10}{summary['mean_ms']:>10.3f}"
+                         + "".join(f"{summary[f'p{p}_ms']:>10.3f}" for p in PERCENTILES) + f"{summary['max_ms']:>10.3f}")
+        lines.append("Counters:")
+        lines.extend(f"  {name:<34}{value:>10}" for name, value in sorted(snapshot['counters'].items()))
+        lines.append("Gauges:")
+        lines.extend(f"  {name:<34}{value:>10}" if isinstance(value, int) else f"  {name:<34}{value:>10.4f}"
+                     for name, value in snapshot['gauges'].items())
+        if 'profile' in snapshot:
+            lines.append(f"Profile ({snapshot['profile']['samples']} samples; own, total):")
+            lines.extend(f"  {own:>6} {total:>6}  {where}" for where, own, total in snapshot['profile']['top'])
+        return "\n".join(lines)
+
+# Decorator that records the latency of a method in self.metrics, and counts refused (False or None, message) results
+def timed(name):
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:  # Count the error and let it propagate
+                self.metrics.count(name + ".error")
+                raise
+            finally:
+                self.metrics.observe(name, perf_counter() - start)
+            if isinstance(result, tuple) and (result[0] is None or result[0] is False):  # Refused; an empty batch still succeeded
+                self.metrics.count(name + ".failed")
+            return result
+        return wrapper
+    return decorate
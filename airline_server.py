@@ -0,0 +1,207 @@
+# The Service of the Airline Reservation System; airline_server.py
+import argparse  # Import argparse for command-line options
+import asyncio  # Import asyncio for the event-loop server
+import functools  # Import functools for passing arguments to executor calls
+import json  # Import json for encoding requests and responses
+import sqlite3  # Import sqlite3 for the errors raised by the SQLite backend
+from concurrent.futures import ThreadPoolExecutor  # Import ThreadPoolExecutor for core calls that may block
+from time import perf_counter  # Import perf_counter for request latencies
+from airline_core import AirlineReservationSystem  # Import the AirlineReservationSystem class
+from airline_storage import SqliteStorage  # Import the SQLite storage backend
+
+# Number of journal records after which an append fsyncs by itself; the server fsyncs per event-loop batch instead
+SERVER_SYNC_EVERY = 1 << 30
+
+# Function to turn a reservation into a JSON-friendly dictionary
+def reservation_to_dict(reservation):
+    return {
+        'passenger_id': reservation.passenger_id,  # Unique ID for the passenger
+        'ticket_number': reservation.ticket_number,  # Unique ticket number for the reservation
+        'seat_number': reservation.seat_number,  # Assigned seat number for the reservation
+        'reservation_time': reservation.reservation_time.isoformat(),  # Time when the booking was made
+    }
+
+# Class for serving the reservation system over a newline-delimited JSON protocol
+class ReservationServer:
+    def __init__(self, system, executor=None):
+        self.system = system  # The reservation system being served
+        self.executor = executor  # Threads for core calls that may block, or None to run them on the event loop
+        self.server = None  # The asyncio server, once started
+        self._waiters = []  # Futures of changes waiting for the next group fsync
+        self._flushing = False  # Whether a group fsync is in progress
+        if system.journal:  # Let the server decide when to fsync
+            system.journal.sync_every = SERVER_SYNC_EVERY
+        self.handlers = {
+            'book': self.book,  # Book a ticket
+            'cancel': self.cancel,  # Cancel a ticket
+            'update': self.update,  # Move a ticket to another seat
+            'info': self.info,  # Look up a ticket
+            'seat': self.seat,  # Look up who holds a seat
+            'window': self.window,  # List the booked window seats
+            'seats': self.seats,  # Count the available seats
+            'metrics': self.metrics,  # Dump the metrics
+        }
+
+    # Method to start listening for clients
+    async def start(self, host="127.0.0.1", port=8642, backlog=4096):
+        self.server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)  # Accept clients
+        return self.server.sockets[0].getsockname()[:2]  # Return the address actually bound
+
+    # Method to stop listening and wait for the last group fsync
+    async def stop(self):
+        self.server.close()  # Stop accepting clients
+        await self.server.wait_closed()  # Wait for the listener to close
+        while self._flushing:  # Let an in-flight group fsync finish
+            await asyncio.sleep(0.01)
+
+    # Method to serve one client connection
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()  # Read one request
+                if not line:  # The client closed the connection
+                    break
+                response = await self.dispatch(line)  # Handle the request
+                writer.write(json.dumps(response).encode() + b"\n")  # Send the response
+                await writer.drain()  # Apply back-pressure to slow clients
+        except (ConnectionError, asyncio.IncompleteReadError):  # The client went away mid-request
+            pass
+        finally:
+            writer.close()  # Close the connection
+
+    # Method to decode a request and run its handler
+    async def dispatch(self, line):
+        try:
+            request = json.loads(line)  # Decode the request
+            handler = self.handlers[request['op']]  # Find the handler for the operation
+        except (ValueError, KeyError, TypeError):  # Handle malformed requests
+            return {'ok': False, 'message': "Invalid request"}
+        start = perf_counter()
+        try:
+            return await handler(request)  # Run the handler
+        except (KeyError, TypeError, ValueError):  # Handle missing or badly typed fields
+            return {'ok': False, 'message': "Invalid request"}
+        except (sqlite3.Error, OSError) as e:  # Handle a busy database or a failed write without dropping the client
+            return {'ok': False, 'message': f"Storage error: {e}"}
+        finally:
+            self.system.metrics.observe('server.' + request['op'], perf_counter() - start)  # Includes waiting for the fsync
+
+    # Method to run a core call; with an executor it runs off the event loop, so a call waiting on a lock held
+    # by another process does not stall every other client
+    async def call(self, function, *args):
+        if self.executor is None:  # File-backed core calls are microsecond-scale
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, *args))
+
+    # Method to wait until every change made so far is durable
+    async def durable(self):
+        if not self.system.journal:  # Nothing to wait for without a journal
+            return
+        future = asyncio.get_running_loop().create_future()  # Resolved by the next group fsync
+        self._waiters.append(future)
+        if not self._flushing:  # Start a flush; later changes join the next batch
+            self._flushing = True
+            asyncio.ensure_future(self._flush())
+        await future
+
+    # Method to fsync the journal once per batch of changes
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._waiters:  # Keep going while changes arrive during the fsync
+                waiters, self._waiters = self._waiters, []  # Take the current batch
+                start = perf_counter()
+                try:
+                    await loop.run_in_executor(None, self.system.journal.sync)  # One fsync for the whole batch
+                except OSError as e:  # Fail every client in the batch instead of leaving them waiting
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self.system.metrics.observe('journal.group_sync', perf_counter() - start)
+                self.system.metrics.count('journal.group_sync.changes', len(waiters))
+                for future in waiters:  # Release every client in the batch
+                    if not future.done():
+                        future.set_result(None)
+        finally:
+            self._flushing = False
+
+    # Method to handle a booking request
+    async def book(self, request):
+        reservation, message = await self.call(self.system.reserve_ticket, request.get('preference'))  # Attempt to book a ticket
+        if not reservation:  # Check if booking failed
+            return {'ok': False, 'message': message}
+        await self.durable()  # Reply only once the booking is durable
+        return {'ok': True, 'message': message, 'reservation': reservation_to_dict(reservation)}
+
+    # Method to handle a cancellation request
+    async def cancel(self, request):
+        success, message = await self.call(self.system.cancel_ticket, request['ticket_number'])  # Attempt to cancel the ticket
+        if success:  # Reply only once the cancellation is durable
+            await self.durable()
+        return {'ok': success, 'message': message}
+
+    # Method to handle a seat change request
+    async def update(self, request):
+        success, message = await self.call(self.system.update_reservation, request['ticket_number'], int(request['seat_number']))  # Attempt to update booking
+        if success:  # Reply only once the change is durable
+            await self.durable()
+        return {'ok': success, 'message': message}
+
+    # Method to handle a ticket lookup
+    async def info(self, request):
+        reservation = await self.call(self.system.get_ticket_info, request['ticket_number'])  # Retrieve ticket information
+        if not reservation:  # Check if the ticket exists
+            return {'ok': False, 'message': "Ticket not found"}
+        return {'ok': True, 'reservation': reservation_to_dict(reservation)}
+
+    # Method to handle a seat lookup
+    async def seat(self, request):
+        reservation = await self.call(self.system.get_seat_occupant, int(request['seat_number']))  # Retrieve the seat's occupant
+        if not reservation:  # Check if the seat is booked
+            return {'ok': False, 'message': "Seat not booked"}
+        return {'ok': True, 'reservation': reservation_to_dict(reservation)}
+
+    # Method to handle a window-seat listing
+    async def window(self, request):
+        return {'ok': True, 'window_seats': await self.call(self.system.get_window_seats)}  # Sorted (seat, ticket) pairs
+
+    # Method to handle a metrics dump
+    async def metrics(self, request):
+        return {'ok': True, 'metrics': await self.call(self.system.metrics.snapshot)}  # Latencies, counters and gauges (some query the store)
+
+    # Method to handle an availability query
+    async def seats(self, request):
+        return {'ok': True, 'available_seats': await self.call(self.system.get_available_seats_count)}  # Number of free seats
+
+# Function to run the server until interrupted
+async def serve(args):
+    storage = SqliteStorage(args.db, import_csv=args.csv_file) if args.db else None  # Several servers can share one database
+    system = AirlineReservationSystem(args.csv_file, journaled=True, capacity=args.capacity, storage=storage)  # Instantiate the system
+    executor = ThreadPoolExecutor(storage.pool.size) if storage else None  # Database calls may wait for other processes
+    server = ReservationServer(system, executor)  # Wrap it in the service layer
+    if args.profile:  # Sample thread stacks; the profile is part of the metrics dump
+        system.metrics.start_profiler()
+    host, port = await server.start(args.host, args.port)  # Start listening
+    print(f"Listening on {host}:{port}", flush=True)  # Tell clients (and the load generator) where to connect
+    try:
+        await asyncio.Event().wait()  # Serve until cancelled
+    finally:
+        await server.stop()  # Stop accepting clients
+        if executor:  # Let in-flight core calls finish before closing
+            executor.shutdown()
+        system.close()  # Save bookings and close the store
+
+# Main entry point of the program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Airline reservation service")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8642, help="port to listen on (0 picks a free port)")
+    parser.add_argument("--csv-file", default="reservations.csv", help="CSV snapshot to load and save")
+    parser.add_argument("--db", help="SQLite database to use instead of the CSV file (imported on first use)")
+    parser.add_argument("--capacity", type=int, default=100, help="number of seats on the flight")
+    parser.add_argument("--profile", action="store_true", help="run the sampling profiler")
+    try:
+        asyncio.run(serve(parser.parse_args()))  # Run the server
+    except KeyboardInterrupt:  # Stop cleanly on Ctrl+C
+        pass
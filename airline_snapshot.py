@@ -0,0 +1,296 @@
+# The Binary Snapshot of the Airline Reservation System; airline_snapshot.py
+import json  # Import json for the table of unusual ticket numbers
+import mmap  # Import mmap for mapping the snapshot into memory
+import os  # Import os for syncing and replacing the snapshot file
+import struct  # Import struct for the fixed-width header and records
+import threading  # Import threading for the mapping locks
+from array import array  # Import array for building the index and seat table
+from bisect import bisect_left  # Import bisect for the ticket-number index
+from airline_columns import to_micros, from_micros, encode_ticket, decode_ticket, EXTENSION_RANGE  # Import the shared encodings
+
+# File layout, every section starting on an 8-byte boundary:
+#   header | free-seat bitmap | seat -> row table (int32) | records | sorted ticket codes (int64) | their rows (uint32) | JSON trailer
+MAGIC = b'AIRSNAP1'  # Identifies a snapshot file
+VERSION = 1  # Format version
+HEADER = struct.Struct('<8sHHIQQQQ')  # magic, version, record size, capacity, record count, free seats, highest passenger ID, trailer size
+RECORD = struct.Struct('<qqqqI')  # passenger ID, ticket code, booking time, cancellation time (microseconds), seat
+CODE = struct.Struct('<q')  # A ticket code read straight out of a record
+CODE_OFFSET = 8  # Offset of the ticket code within a record
+SEAT = struct.Struct('<I')  # A seat number read straight out of a record
+SEAT_OFFSET = 32  # Offset of the seat number within a record
+
+# Function to round an offset up to the next 8-byte boundary
+def _align(offset):
+    return (offset + 7) & ~7
+
+# Function to compute the section offsets for a cabin size and record count
+def _layout(capacity, count):
+    bitmap = HEADER.size  # Free-seat bitmap, exactly as SeatMap stores it
+    seat_table = _align(bitmap + capacity // 8 + 1)  # Row holding each seat, -1 if free
+    records = _align(seat_table + 4 * (capacity + 1))  # Fixed-width records
+    codes = _align(records + RECORD.size * count)  # Ticket codes in ascending order
+    rows = codes + 8 * count  # Row of each sorted code
+    trailer = _align(rows + 4 * count)  # Ticket numbers that could not be encoded
+    return bitmap, seat_table, records, codes, rows, trailer
+
+# Function to pack a reservation into a record; returns (record bytes, ticket number if it needs the trailer)
+def pack_reservation(reservation):
+    code = encode_ticket(reservation.ticket_number)  # Compact encoding of the ticket number
+    record = RECORD.pack(reservation.passenger_id, code, to_micros(reservation.reservation_time),
+                         to_micros(reservation.cancellation_time), reservation.seat_number)
+    return record, (reservation.ticket_number if code < 0 else None)
+
+# Function to write a snapshot atomically from (record bytes, trailer ticket) pairs; reader is the open mapping of path, if any
+def write_snapshot(path, capacity, bits, free_count, records, max_passenger_id, reader=None):
+    count = len(records)  # Number of reservations
+    bitmap, seat_table, records_at, codes_at, rows_at, trailer_at = _layout(capacity, count)
+    data = b''.join(record for record, _ in records)  # Every record, in row order
+    codes = array('q', (CODE.unpack_from(data, row * RECORD.size + CODE_OFFSET)[0] for row in range(count)))
+    seat_rows = array('i', [-1]) * (capacity + 1)  # Every seat starts free
+    for row in range(count):  # Point each booked seat at its row
+        seat_rows[SEAT.unpack_from(data, row * RECORD.size + SEAT_OFFSET)[0]] = row
+    order = sorted(range(count), key=codes.__getitem__)  # Rows in ticket-code order
+    trailer = json.dumps({row: ticket for row, (_, ticket) in enumerate(records) if ticket}).encode()
+
+    temp_file = path + ".tmp"  # Write beside the snapshot so the rename is atomic
+    with open(temp_file, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, count, free_count, max_passenger_id, len(trailer)))
+        file.write(bytes(bits).ljust(seat_table - bitmap, b'\0'))  # Bitmap, padded to the seat table
+        file.write(seat_rows.tobytes().ljust(records_at - seat_table, b'\0'))  # Seat table, padded to the records
+        file.write(data.ljust(codes_at - records_at, b'\0'))  # Records, padded to the index
+        file.write(array('q', (codes[row] for row in order)).tobytes())  # Sorted ticket codes
+        file.write(array('I', order).tobytes().ljust(trailer_at - rows_at, b'\0'))  # Their rows, padded to the trailer
+        file.write(trailer)  # Unusual ticket numbers
+        file.flush()  # Hand the data to the OS
+        os.fsync(file.fileno())  # Make the snapshot durable before it replaces the old one
+    if reader is not None:  # A mapped file cannot be replaced on Windows; unmap it around the swap
+        reader.replace(temp_file)
+    else:
+        os.replace(temp_file, path)  # Swap in the new snapshot
+
+# Class for reading a snapshot through a memory map, decoding records only when asked
+class SnapshotReader:
+    def __init__(self, path):
+        self.path = path  # Path of the snapshot file
+        self.lock = threading.RLock()  # Held by every read, so the file can be swapped under a reader
+        self._map_file()
+
+    # Method to map the snapshot file and locate its sections
+    def _map_file(self):
+        path = self.path
+        self._file = open(path, 'rb')  # Keep the file open for the mapping's lifetime
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)  # Map the whole file
+        magic, version, record_size, self.capacity, self.count, self.free_count, self.max_passenger_id, trailer_size = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:  # Refuse unknown files
+            self._unmap()
+            raise ValueError(f"{path} is not a version {VERSION} reservation snapshot")
+        bitmap, seat_table, self._records, codes, rows, trailer = _layout(self.capacity, self.count)
+        view = memoryview(self._map)  # Zero-copy views of the mapped sections
+        self.bits = view[bitmap:bitmap + self.capacity // 8 + 1]  # Free-seat bitmap
+        self.seat_rows = view[seat_table:seat_table + 4 * (self.capacity + 1)].cast('i')  # Seat -> row
+        self.codes = view[codes:codes + 8 * self.count].cast('q')  # Sorted ticket codes
+        self.rows = view[rows:rows + 4 * self.count].cast('I')  # Row of each sorted code
+        self.text_tickets = {int(row): ticket for row, ticket in
+                             json.loads(bytes(view[trailer:trailer + trailer_size]) or b'{}').items()}  # Row -> unusual ticket
+        self.text_rows = {ticket: row for row, ticket in self.text_tickets.items()}  # Unusual ticket -> row
+        view.release()  # The section views keep the mapping alive on their own
+
+    # Method to find the row of a ticket, or -1 if it is not in the snapshot
+    def find(self, ticket_number):
+        code = encode_ticket(ticket_number)
+        with self.lock:
+            if code < 0:  # Unusual ticket numbers are looked up in the trailer
+                return self.text_rows.get(ticket_number, -1)
+            index = bisect_left(self.codes, code)  # Binary search of the ticket index
+            if index < self.count and self.codes[index] == code:
+                return self.rows[index]
+            return -1
+
+    # Method to decode a row into (passenger ID, ticket number, seat, booking time, cancellation time)
+    def record(self, row):
+        with self.lock:
+            passenger_id, code, reserved, cancelled, seat = RECORD.unpack_from(self._map, self._records + row * RECORD.size)
+            ticket_number = decode_ticket(code) if code >= 0 else self.text_tickets[row]
+        return passenger_id, ticket_number, seat, from_micros(reserved), from_micros(cancelled)
+
+    # Method to decode the record of a ticket, or None if it is not in the snapshot
+    def lookup(self, ticket_number):
+        with self.lock:  # Rows are renumbered when the file is replaced
+            row = self.find(ticket_number)
+            return self.record(row) if row >= 0 else None
+
+    # Method to get the raw bytes and trailer ticket of a row, for copying it into a new snapshot
+    def raw(self, row):
+        offset = self._records + row * RECORD.size
+        with self.lock:
+            return self._map[offset:offset + RECORD.size], self.text_tickets.get(row)
+
+    # Method to get the ticket number stored in a row
+    def ticket_at(self, row):
+        with self.lock:
+            code = CODE.unpack_from(self._map, self._records + row * RECORD.size + CODE_OFFSET)[0]
+            return decode_ticket(code) if code >= 0 else self.text_tickets[row]
+
+    # Method to get the ticket holding a seat when the snapshot was written, or None
+    def seat_ticket(self, seat):
+        with self.lock:
+            row = self.seat_rows[seat]
+            return self.ticket_at(row) if row >= 0 else None
+
+    # Method to get the ticket numbers a passenger held when the snapshot was written
+    def passenger_tickets(self, passenger_id):
+        with self.lock:
+            low = bisect_left(self.codes, passenger_id * EXTENSION_RANGE)  # Codes sort by passenger ID first
+            high = bisect_left(self.codes, (passenger_id + 1) * EXTENSION_RANGE)
+            tickets = [decode_ticket(self.codes[index]) for index in range(low, high)]
+            tickets += [ticket for row, ticket in self.text_tickets.items()
+                        if RECORD.unpack_from(self._map, self._records + row * RECORD.size)[0] == passenger_id]
+            return tickets
+
+    # Method to swap a newly written file in for the mapped one; reads wait until the new file is mapped
+    def replace(self, temp_file):
+        with self.lock:
+            self._unmap()  # Windows refuses to replace a file that is open or mapped
+            try:
+                os.replace(temp_file, self.path)  # Swap in the new snapshot
+            finally:
+                self._map_file()  # Map whichever file is in place now
+
+    # Method to release the section views, the mapping and the file
+    def _unmap(self):
+        for name in ('bits', 'seat_rows', 'codes', 'rows'):  # Views must go before the mapping can close
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    # Method to unmap and close the snapshot
+    def close(self):
+        with self.lock:
+            self._unmap()
+
+# Class for a dictionary-like view of the reservations: a snapshot plus the changes made since it was opened
+class LazyReservations:
+    def __init__(self, reader, factory):
+        self.reader = reader  # The mapped snapshot
+        self.factory = factory  # Builds a reservation from (passenger_id, ticket_number, seat_number, reservation_time)
+        self.loaded = {}  # Reservations decoded or added since opening, keyed by ticket number
+        self.removed = set()  # Tickets cancelled since opening; kept even if not in this snapshot, as a newer one may hold them
+        self._count = reader.count  # Number of live reservations
+        self._lock = threading.Lock()  # Makes decoding and changes atomic, so a ticket is only ever decoded once
+
+    # Method to check whether a ticket is in the snapshot and not cancelled since
+    def _in_snapshot(self, ticket_number):
+        return ticket_number not in self.removed and self.reader.find(ticket_number) >= 0
+
+    # Method to build a reservation object from a decoded snapshot record
+    def _decode(self, record):
+        passenger_id, ticket_number, seat_number, reserved, cancelled = record
+        reservation = self.factory(passenger_id, ticket_number, seat_number, reserved)
+        reservation.cancellation_time = cancelled
+        return reservation
+
+    # Method to get a reservation, decoding it from the snapshot on first access
+    def get(self, ticket_number, default=None):
+        reservation = self.loaded.get(ticket_number)  # Fast path: already decoded or added
+        if reservation is not None:
+            return reservation
+        with self._lock:
+            reservation = self.loaded.get(ticket_number)  # Another thread may have decoded it meanwhile
+            if reservation is not None:
+                return reservation
+            if ticket_number in self.removed:  # Cancelled since the snapshot was written
+                return default
+            record = self.reader.lookup(ticket_number)
+            if record is None:  # Not in the snapshot either
+                return default
+            reservation = self.loaded[ticket_number] = self._decode(record)  # Decode once and keep it
+            return reservation
+
+    # Method to support "reservations[ticket_number]"
+    def __getitem__(self, ticket_number):
+        reservation = self.get(ticket_number)
+        if reservation is None:
+            raise KeyError(ticket_number)
+        return reservation
+
+    # Method to support "ticket_number in reservations"
+    def __contains__(self, ticket_number):
+        return ticket_number in self.loaded or self._in_snapshot(ticket_number)
+
+    # Method to add or replace a reservation
+    def __setitem__(self, ticket_number, reservation):
+        with self._lock:
+            if ticket_number not in self.loaded and not self._in_snapshot(ticket_number):  # A new ticket
+                self._count += 1
+            self.loaded[ticket_number] = reservation
+            self.removed.discard(ticket_number)
+
+    # Method to remove a reservation
+    def __delitem__(self, ticket_number):
+        with self._lock:
+            in_snapshot = self._in_snapshot(ticket_number)
+            if self.loaded.pop(ticket_number, None) is None and not in_snapshot:
+                raise KeyError(ticket_number)
+            self.removed.add(ticket_number)  # Hide the snapshot row from now on, in this file or any that replaces it
+            self._count -= 1
+
+    # Method to remove a reservation and return it
+    def pop(self, ticket_number, *default):
+        reservation = self.get(ticket_number)
+        if reservation is None:
+            if default:
+                return default[0]
+            raise KeyError(ticket_number)
+        del self[ticket_number]
+        return reservation
+
+    # Method to count the live reservations
+    def __len__(self):
+        return self._count
+
+    # Method to list every live reservation; untouched snapshot rows are decoded for the list, not kept
+    def values(self):
+        with self._lock:  # Take a consistent picture of the changes
+            loaded = list(self.loaded.values())
+            skip = self.removed | set(self.loaded)
+        reader = self.reader
+        with reader.lock:  # Read every row from the same file, even if a save replaces it meanwhile
+            records = [reader.record(row) for row in range(reader.count) if reader.ticket_at(row) not in skip]
+        return loaded + [self._decode(record) for record in records]
+
+    # Method to collect (record bytes, trailer ticket) pairs for every live reservation, copying untouched rows as-is
+    def snapshot_records(self):
+        with self._lock:  # Take a consistent picture of the changes
+            records = [pack_reservation(reservation) for reservation in self.loaded.values()]
+            skip = {encode_ticket(ticket) for ticket in self.removed | set(self.loaded)}
+            skip_text = self.removed | set(self.loaded)
+        reader = self.reader
+        with reader.lock:  # Read every row from the same file
+            for row in range(reader.count):
+                record, ticket = reader.raw(row)
+                if (ticket in skip_text) if ticket else (CODE.unpack_from(record, CODE_OFFSET)[0] in skip):
+                    continue
+                records.append((record, ticket))
+        return records
+
+# Class for the seat -> ticket index on top of a snapshot: reads fall through to the snapshot's seat table
+class LazySeatTickets:
+    _UNSET = object()  # Marks seats not changed since the snapshot was opened
+
+    def __init__(self, reader, capacity):
+        self.reader = reader  # The mapped snapshot
+        self.overrides = [self._UNSET] * (capacity + 1)  # Seats changed since opening
+
+    # Method to get the ticket holding a seat, or None
+    def __getitem__(self, seat):
+        ticket_number = self.overrides[seat]
+        if ticket_number is self._UNSET:  # Unchanged; read the snapshot's seat table
+            return self.reader.seat_ticket(seat)
+        return ticket_number
+
+    # Method to record the ticket now holding a seat
+    def __setitem__(self, seat, ticket_number):
+        self.overrides[seat] = ticket_number
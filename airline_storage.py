@@ -0,0 +1,585 @@
+# The Storage of the Airline Reservation System; airline_storage.py
+import csv  # Import the csv module for the CSV snapshot and imports
+import functools  # Import functools for the transactional decorator
+import os  # Import os for file checks
+import queue  # Import queue for the idle connections of the pool
+import sqlite3  # Import sqlite3 for the shared database backend
+import threading  # Import threading for the writer lock and per-thread transactions
+from contextlib import contextmanager, nullcontext  # Import contextlib for transaction scopes
+from datetime import datetime  # Import datetime for parsing stored times
+from itertools import groupby  # Import groupby for batching records by operation
+from airline_journal import ReservationJournal, OP_BOOK, OP_CANCEL, OP_UPDATE  # Import the write-ahead journal
+from airline_ids import IdAllocator  # Import the unique ID allocator
+from airline_snapshot import SnapshotReader, LazyReservations, LazySeatTickets, write_snapshot, pack_reservation  # Import the binary snapshot
+from airline_history import ReservationHistory, BOOKED, CANCELLED, MOVED  # Import the reservation history
+
+NO_TRANSACTION = nullcontext()  # Transaction scope of backends that need none
+
+# Decorator that runs a method of AirlineReservationSystem inside one storage transaction
+def transactional(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.storage.transaction(self):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+# Class for the interface every storage backend implements
+class StorageBackend:
+    journal = None  # Write-ahead journal, for backends that keep one
+
+    # Method to create the passenger ID allocator for the system
+    def id_allocator(self):
+        return IdAllocator()
+
+    # Method to load the stored state into a new system; factory creates reservation objects
+    def open(self, system, factory):
+        raise NotImplementedError
+
+    # Method to get the scope every change runs in; backends shared between processes serialize writers here
+    def transaction(self, system):
+        return NO_TRANSACTION
+
+    # Method to persist (op, passenger_id, ticket_number, seat_number, time) records of one change
+    def record(self, records):
+        pass
+
+    # Method to pick up changes made by other processes before reading in-memory state
+    def sync(self, system):
+        pass
+
+    # Method to write everything to the store
+    def save(self, system):
+        raise NotImplementedError
+
+    # Method to release files and connections
+    def close(self, system):
+        pass
+
+# Class for the file backend: a CSV or binary snapshot, optionally with a write-ahead journal
+class FileStorage(StorageBackend):
+    def __init__(self, csv_file="reservations.csv", journaled=False, snapshot_file=None):
+        self.csv_file = csv_file  # Path to the CSV file storing bookings
+        self.snapshot_file = snapshot_file  # Path to the binary snapshot; when set, CSV is only used for import/export
+        self.journaled = journaled  # Log every change instead of relying on a save at quit time
+        self.store = snapshot_file or csv_file  # The journal, ID counter and history live beside the primary store
+        self.history_file = self.store + ".history"  # The history is saved beside the primary store
+        self.factory = None  # Creates reservation objects, set by open
+
+    # Method to create the passenger ID allocator, leasing blocks from a counter file shared with other processes
+    def id_allocator(self):
+        return IdAllocator(self.store + ".ids")
+
+    # Method to load existing reservations from the binary snapshot, or else from the CSV file
+    def open(self, system, factory):
+        self.factory = factory
+        if self.journaled:  # Log every change instead of relying on a save at quit time
+            self.journal = ReservationJournal(self.store + ".journal", compactor=lambda: self.write_snapshot(system))
+            system.journal = self.journal
+        history_loaded = self._load_history(system)  # Load the history saved with the last snapshot
+        if self.snapshot_file and os.path.exists(self.snapshot_file):  # Map the snapshot instead of parsing every row
+            self._open_snapshot(system)
+        else:
+            self._load_csv(system, history_loaded)
+        if self.journal:  # Compact only once the snapshot or CSV and the journal have been fully loaded
+            self.journal.start()
+
+    # Method to load the CSV file, replay the journal and derive the seat and ID state
+    def _load_csv(self, system, history_loaded):
+        factory = self.factory
+        if os.path.exists(self.csv_file):  # Check if the CSV file exists
+            try:
+                with open(self.csv_file, 'r', newline='') as file:  # Open the CSV file
+                    reader = csv.DictReader(file)  # Create a CSV reader
+                    for row in reader:  # Iterate through each row in the CSV
+                        reservation = factory(
+                            passenger_id=int(row['passenger_id']),  # Create a reservation object
+                            ticket_number=row['ticket_number'],
+                            seat_number=int(row['seat_number']),
+                            reservation_time=datetime.fromisoformat(row['reservation_time'])  # Convert time to datetime object
+                        )
+                        if not history_loaded:  # Rebuild the history from the CSV when it has no history file
+                            system.history.record_booking(reservation)
+                        if row['cancellation_time']:  # Cancelled rows belong to the history, not the live bookings
+                            reservation.cancellation_time = datetime.fromisoformat(row['cancellation_time'])
+                            if not history_loaded:
+                                system.history.record_cancellation(reservation)
+                            continue
+                        system.reservations[reservation.ticket_number] = reservation  # Store reservation in dictionary
+
+            except (FileNotFoundError, csv.Error) as e:  # Handle file not found or CSV errors
+                print(f"Error loading reservations: {e}")  # Print error message
+
+        if self.journal:  # Replay changes made since the snapshot was written
+            self.replay_journal(system)
+
+        for reservation in list(system.reservations.values()):  # Derive seat and ID state from the loaded bookings
+            if not system.seats.claim(reservation.seat_number):  # Remove seat from available seats
+                print(f"Skipping ticket {reservation.ticket_number}: seat {reservation.seat_number} is not available")
+                del system.reservations[reservation.ticket_number]  # Drop bookings that clash or do not fit the cabin
+                continue
+            system.passenger_ids.observe(reservation.passenger_id)  # Never hand out a loaded passenger ID again
+            system._index_add(reservation)  # Add the reservation to the secondary indexes
+
+    # Method to load the history file; returns whether one was loaded
+    def _load_history(self, system):
+        if not os.path.exists(self.history_file):  # Nothing saved yet
+            return False
+        try:
+            system.history = ReservationHistory.load(self.history_file)  # Read the saved columns
+        except (OSError, ValueError) as e:  # Handle unreadable or foreign files
+            print(f"Error loading history: {e}")  # Print error message
+            return False
+        return True
+
+    # Method to map the binary snapshot; records are decoded only when a ticket is looked up
+    def _open_snapshot(self, system):
+        try:
+            reader = SnapshotReader(self.snapshot_file)  # Map the snapshot file
+        except (OSError, ValueError) as e:  # Handle unreadable or foreign files
+            print(f"Error loading reservations: {e}")  # Print error message
+            return
+        if reader.capacity != system.capacity:  # The snapshot is for a different cabin
+            print(f"Error loading reservations: snapshot has {reader.capacity} seats, expected {system.capacity}")
+            reader.close()
+            return
+
+        system.snapshot = reader  # Keep the mapping for lazy lookups
+        system.seats.load_bits(reader.bits)  # Copy the free-seat bitmap in one step
+        system.reservations = LazyReservations(reader, self.factory)  # Decode reservations on first access
+        system.seat_tickets = LazySeatTickets(reader, system.capacity)  # Read seat owners from the snapshot's seat table
+        system.passenger_ids.observe(reader.max_passenger_id)  # Never hand out a saved passenger ID again
+        if not self.journal:  # Nothing to replay
+            return
+
+        touched_tickets, touched_seats = self.replay_journal(system)  # Apply changes made since the snapshot was written
+        owners = {}  # Seat -> ticket for every replayed ticket that is still booked
+        for ticket_number in touched_tickets:
+            reservation = system.reservations.get(ticket_number)
+            if reservation:  # Still booked after replay
+                owners[reservation.seat_number] = ticket_number
+                system.passenger_ids.observe(reservation.passenger_id)
+                if reader.find(ticket_number) < 0:  # Tickets booked after the snapshot go in the passenger index
+                    system.passenger_tickets.setdefault(reservation.passenger_id, set()).add(ticket_number)
+        for seat in touched_seats:  # Re-derive only the seats the journal touched
+            if not 0 < seat <= system.capacity:
+                continue
+            owner = owners.get(seat)
+            if owner is None:  # Fall back to the snapshot's owner if the journal left it alone
+                saved = system.seat_tickets[seat]
+                if saved and saved not in touched_tickets and saved in system.reservations:
+                    owner = saved
+            if owner:
+                system.seats.claim(seat)
+            else:
+                system.seats.release(seat)
+            system.seat_tickets[seat] = owner
+
+    # Method to apply journal records on top of the loaded snapshot; returns the tickets and seats they touched
+    def replay_journal(self, system):
+        # Records are applied last-writer-wins per ticket, so replaying records that the
+        # snapshot already contains (after a crash mid-compaction) leaves the state unchanged;
+        # history events are only added for records that actually change the state
+        touched_tickets, touched_seats = set(), set()
+        cancelled = None  # Tickets the saved history already holds as cancelled, built on first use
+        for op, passenger_id, ticket_number, seat_number, timestamp in self.journal.read_records():
+            current = system.reservations.get(ticket_number)
+            if cancelled is None:
+                cancelled = system.history.cancelled_tickets()
+            if ticket_number in cancelled and current is None:  # Cancelled before the snapshot; its records are all stale
+                continue
+            if current:  # The ticket's previous seat is affected too
+                touched_seats.add(current.seat_number)
+            touched_tickets.add(ticket_number)
+            touched_seats.add(seat_number)
+            if op == OP_BOOK:  # Recreate the booked reservation
+                reservation = self.factory(
+                    passenger_id=passenger_id,
+                    ticket_number=ticket_number,
+                    seat_number=seat_number,
+                    reservation_time=datetime.fromisoformat(timestamp)
+                )
+                system.reservations[ticket_number] = reservation
+                if current is None:  # A booking the history has not seen
+                    system.history.record_booking(reservation)
+            elif op == OP_CANCEL and current:  # The snapshot still holds the ticket as live, so the cancellation applies
+                system.reservations.pop(ticket_number)
+                current.cancellation_time = datetime.fromisoformat(timestamp)
+                if ticket_number not in cancelled:  # The saved history may already hold it
+                    system.history.record_cancellation(current)
+                    cancelled.add(ticket_number)
+            elif op == OP_UPDATE and current:  # Move the reservation to its new seat
+                if current.seat_number != seat_number:  # A seat change the history has not seen
+                    system.history.record_move(datetime.fromisoformat(timestamp), current.seat_number, seat_number)
+                current.seat_number = seat_number
+        return touched_tickets, touched_seats
+
+    # Method to log change records in journaled mode
+    def record(self, records):
+        if not self.journal:  # Without a journal, changes reach the disk at the next save
+            return
+        if len(records) == 1:  # A single change
+            self.journal.append(*records[0])
+        else:  # A batch, logged with a single write
+            self.journal.append_many(records)
+
+    # Method to write every current reservation and the history to the primary store atomically
+    def write_snapshot(self, system):
+        with system.seat_lock:  # Take the seat map, the reservations and the history at the same moment
+            if not self.snapshot_file:  # CSV snapshot
+                records = system.csv_records()  # Raw fields only; the rows are formatted after the lock is released
+            else:  # Binary snapshot
+                bits, free_count = bytes(system.seats.bits), system.seats.free_count
+                if system.snapshot:  # Untouched rows are copied from the mapped snapshot as-is
+                    records = system.reservations.snapshot_records()
+                else:
+                    records = [pack_reservation(reservation) for reservation in list(system.reservations.values())]
+            history = system.history.capture()
+        # The history goes first: after a crash between the two writes, replay re-applies the journal to the old
+        # snapshot and skips cancellations the new history already holds, instead of losing them
+        system.history.save(self.history_file, history)
+        if not self.snapshot_file:
+            system.export_csv(self.csv_file, records)
+        else:
+            write_snapshot(self.snapshot_file, system.capacity, bits, free_count, records, system.passenger_ids.last_id,
+                           reader=system.snapshot)  # The mapped snapshot is released around the swap
+
+    # Method to save current reservations to the snapshot
+    def save(self, system):
+        if self.journal:  # Fold the journal into the snapshot
+            self.journal.compact()
+        else:
+            self.write_snapshot(system)  # Rewrite the whole snapshot
+
+    # Method to release the journal and the snapshot mapping
+    def close(self, system):
+        if self.journal:  # Stop the background worker and close the journal
+            self.journal.close()
+        if system.snapshot:  # Unmap the binary snapshot
+            system.snapshot.close()
+
+# SQL used by the SQLite backend; each statement is compiled once per connection and reused from its statement cache
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS reservations (
+    ticket_number TEXT PRIMARY KEY,
+    passenger_id INTEGER NOT NULL,
+    seat_number INTEGER NOT NULL,
+    reservation_time TEXT NOT NULL,
+    cancellation_time TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS reservations_booked_seat ON reservations (seat_number) WHERE cancellation_time IS NULL;
+CREATE INDEX IF NOT EXISTS reservations_passenger ON reservations (passenger_id);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    passenger_id INTEGER NOT NULL,
+    ticket_number TEXT NOT NULL,
+    seat_number INTEGER NOT NULL,
+    old_seat INTEGER,
+    time TEXT NOT NULL
+);
+"""
+SET_CAPACITY = "INSERT OR IGNORE INTO settings (name, value) VALUES ('capacity', ?)"
+GET_CAPACITY = "SELECT value FROM settings WHERE name = 'capacity'"
+BOOKED_SEATS = "SELECT seat_number, ticket_number FROM reservations WHERE cancellation_time IS NULL"
+MAX_PASSENGER = "SELECT MAX(passenger_id) FROM reservations"
+LATEST_CHANGE = "SELECT MAX(id) FROM changes"
+GET_BOOKED = ("SELECT passenger_id, ticket_number, seat_number, reservation_time FROM reservations "
+              "WHERE ticket_number = ? AND cancellation_time IS NULL")
+ALL_BOOKED = ("SELECT passenger_id, ticket_number, seat_number, reservation_time FROM reservations "
+              "WHERE cancellation_time IS NULL ORDER BY rowid")
+COUNT_BOOKED = "SELECT COUNT(*) FROM reservations WHERE cancellation_time IS NULL"
+PASSENGER_TICKETS = "SELECT ticket_number FROM reservations WHERE passenger_id = ? AND cancellation_time IS NULL"
+INSERT_BOOKING = ("INSERT INTO reservations (passenger_id, ticket_number, seat_number, reservation_time) "
+                  "VALUES (?, ?, ?, ?)")
+INSERT_CANCELLED = ("INSERT INTO reservations (passenger_id, ticket_number, seat_number, reservation_time, cancellation_time) "
+                    "VALUES (?, ?, ?, ?, ?)")
+CANCEL_BOOKING = "UPDATE reservations SET cancellation_time = ? WHERE ticket_number = ?"
+GET_SEAT = "SELECT seat_number FROM reservations WHERE ticket_number = ?"
+PARK_SEAT = "UPDATE reservations SET seat_number = -seat_number WHERE ticket_number = ?"
+MOVE_BOOKING = "UPDATE reservations SET seat_number = ? WHERE ticket_number = ?"
+INSERT_CHANGE = ("INSERT INTO changes (op, passenger_id, ticket_number, seat_number, old_seat, time) "
+                 "VALUES (?, ?, ?, ?, ?, ?)")
+CHANGES_SINCE = ("SELECT c.id, c.op, c.passenger_id, c.ticket_number, c.seat_number, c.old_seat, c.time, r.reservation_time "
+                 "FROM changes c JOIN reservations r ON r.ticket_number = c.ticket_number WHERE c.id > ? ORDER BY c.id")
+EVENTS_UNTIL = "SELECT op, seat_number, old_seat, time FROM changes WHERE id <= ? ORDER BY id"
+CANCELLED_UNTIL = ("SELECT r.passenger_id, r.ticket_number, r.seat_number, r.reservation_time, r.cancellation_time "
+                   "FROM changes c JOIN reservations r ON r.ticket_number = c.ticket_number "
+                   "WHERE c.op = 'C' AND c.id <= ? ORDER BY c.id")
+EVENT_KINDS = {OP_BOOK: BOOKED, OP_CANCEL: CANCELLED, OP_UPDATE: MOVED}  # Change op -> history event kind
+
+# Class for a pool of SQLite connections shared by the threads of one process
+class ConnectionPool:
+    def __init__(self, path, size=8, timeout=30.0):
+        self.path = path  # Database file
+        self.size = size  # Most connections open at once
+        self.timeout = timeout  # Seconds to wait for another process's write lock
+        self._idle = queue.LifoQueue()  # Connections not in use; the most recently used is reused first
+        self._created = 0  # Connections opened so far
+        self._lock = threading.Lock()  # Guards the count of opened connections
+
+    # Method to open and configure one connection
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,  # Transactions are explicit
+                                     check_same_thread=False, cached_statements=64)  # Prepared statements are reused
+        connection.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer, nor the writer readers
+        connection.execute("PRAGMA synchronous=NORMAL")  # With WAL, commits survive a process crash without an fsync each
+        return connection
+
+    # Method to borrow a connection for the duration of a with block
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self._idle.get_nowait()  # Reuse an idle connection
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size  # Open another one while under the limit
+                if create:
+                    self._created += 1
+            connection = self._connect() if create else self._idle.get()  # Otherwise wait for one
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)  # Give it back
+
+    # Method to close every idle connection
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# Class for the reservations of a SQLite store, read from the database on each lookup
+class SqliteReservations:
+    def __init__(self, storage, factory):
+        self.storage = storage  # The backend running the queries
+        self.factory = factory  # Creates reservation objects
+
+    # Method to turn a row into a reservation
+    def _reservation(self, row):
+        passenger_id, ticket_number, seat_number, reservation_time = row
+        return self.factory(passenger_id, ticket_number, seat_number, datetime.fromisoformat(reservation_time))
+
+    # Method to look up a booked reservation by ticket number
+    def get(self, ticket_number, default=None):
+        rows = self.storage.query(GET_BOOKED, (ticket_number,))
+        return self._reservation(rows[0]) if rows else default
+
+    def __getitem__(self, ticket_number):
+        reservation = self.get(ticket_number)
+        if reservation is None:
+            raise KeyError(ticket_number)
+        return reservation
+
+    def __contains__(self, ticket_number):
+        return self.get(ticket_number) is not None
+
+    # Changes reach the database through StorageBackend.record, so these only keep the dict interface
+    def __setitem__(self, ticket_number, reservation):
+        pass
+
+    def __delitem__(self, ticket_number):
+        pass
+
+    def pop(self, ticket_number, *default):
+        reservation = self.get(ticket_number)
+        if reservation is None:
+            if default:
+                return default[0]
+            raise KeyError(ticket_number)
+        return reservation
+
+    def __len__(self):
+        return self.storage.query(COUNT_BOOKED)[0][0]
+
+    # Method to get every booked reservation
+    def values(self):
+        return [self._reservation(row) for row in self.storage.query(ALL_BOOKED)]
+
+# Class for the passenger -> tickets index of a SQLite store, answered by the passenger index of the database
+class SqlitePassengerTickets:
+    def __init__(self, storage):
+        self.storage = storage  # The backend running the queries
+
+    def get(self, passenger_id, default=None):
+        tickets = {ticket_number for ticket_number, in self.storage.query(PASSENGER_TICKETS, (passenger_id,))}
+        return tickets or default
+
+    # Changes reach the database through StorageBackend.record, so these only keep the dict interface
+    def setdefault(self, passenger_id, default=None):
+        return default
+
+    def __delitem__(self, passenger_id):
+        pass
+
+# Class for the SQLite backend: several processes can book the same flight, and only seat state is loaded at startup
+class SqliteStorage(StorageBackend):
+    def __init__(self, path="reservations.db", pool_size=8, timeout=30.0, import_csv=None):
+        self.path = path  # Database file
+        self.import_csv = import_csv  # CSV file imported when the database is first created
+        self.pool = ConnectionPool(path, pool_size, timeout)  # Connections shared by this process's threads
+        self.last_change = 0  # Newest change already applied to this process's seat state
+        self.factory = None  # Creates reservation objects, set by open
+        self._writer = threading.Lock()  # Threads of this process take turns before competing with other processes
+        self._local = threading.local()  # The connection of the transaction running on each thread
+
+    # Method to run a query, inside the calling thread's transaction if it has one
+    def query(self, sql, parameters=()):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:  # See the transaction's own uncommitted changes
+            return connection.execute(sql, parameters).fetchall()
+        with self.pool.connection() as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    # Method to create the schema, import the CSV into a new database and load the seat state
+    def open(self, system, factory):
+        self.factory = factory
+        with self.pool.connection() as connection:
+            connection.executescript(SCHEMA)  # Create the tables on first use
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(SET_CAPACITY, (str(system.capacity),))  # The first process decides the cabin size
+                capacity = int(connection.execute(GET_CAPACITY).fetchone()[0])
+                if capacity == system.capacity and self.import_csv and os.path.exists(self.import_csv) \
+                        and connection.execute(LATEST_CHANGE).fetchone()[0] is None:  # A new database
+                    self._import(connection, self.import_csv)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            if capacity != system.capacity:  # The database is for a different cabin
+                raise ValueError(f"{self.path} has {capacity} seats, expected {system.capacity}")
+            for seat_number, ticket_number in connection.execute(BOOKED_SEATS):  # Only seat state is held in memory
+                if system.seats.claim(seat_number):
+                    system.seat_tickets[seat_number] = ticket_number
+            system.passenger_ids.observe(connection.execute(MAX_PASSENGER).fetchone()[0] or 0)  # Never reuse a passenger ID
+            self.last_change = connection.execute(LATEST_CHANGE).fetchone()[0] or 0
+        system.reservations = SqliteReservations(self, factory)  # Reservations are read on lookup
+        system.passenger_tickets = SqlitePassengerTickets(self)
+        last_change = self.last_change
+        system.history.defer(lambda: self._load_history(last_change))  # The history is read on its first query
+
+    # Method to copy the rows of a CSV snapshot into a new database
+    def _import(self, connection, csv_file):
+        try:
+            with open(csv_file, 'r', newline='') as file:  # Open the CSV file
+                for row in csv.DictReader(file):
+                    passenger_id, ticket_number, seat_number = int(row['passenger_id']), row['ticket_number'], int(row['seat_number'])
+                    try:
+                        connection.execute(INSERT_CANCELLED, (passenger_id, ticket_number, seat_number, row['reservation_time'],
+                                                              row['cancellation_time'] or None))
+                    except sqlite3.IntegrityError:  # Drop bookings that clash
+                        print(f"Skipping ticket {ticket_number}: seat {seat_number} is not available")
+                        continue
+                    connection.execute(INSERT_CHANGE, (OP_BOOK, passenger_id, ticket_number, seat_number, None, row['reservation_time']))
+                    if row['cancellation_time']:  # Cancelled rows keep their place in the history
+                        connection.execute(INSERT_CHANGE, (OP_CANCEL, passenger_id, ticket_number, seat_number, None,
+                                                           row['cancellation_time']))
+        except csv.Error as e:  # Handle CSV errors
+            print(f"Error importing reservations: {e}")  # Print error message
+
+    # Method to build the history recorded up to a change
+    def _load_history(self, last_change):
+        history = ReservationHistory()
+        with self.pool.connection() as connection:
+            for op, seat_number, old_seat, time in connection.execute(EVENTS_UNTIL, (last_change,)):
+                history.record(EVENT_KINDS[op], datetime.fromisoformat(time), seat_number, old_seat or 0)
+            for passenger_id, ticket_number, seat_number, reservation_time, cancellation_time in \
+                    connection.execute(CANCELLED_UNTIL, (last_change,)):
+                reservation = self.factory(passenger_id, ticket_number, seat_number, datetime.fromisoformat(reservation_time))
+                reservation.cancellation_time = datetime.fromisoformat(cancellation_time)
+                history.cancelled.append(reservation)
+        return history
+
+    # Method to apply changes committed by other processes to this process's seat state (called with the seat lock held)
+    def _apply_changes(self, system, connection):
+        for change_id, op, passenger_id, ticket_number, seat_number, old_seat, time, reservation_time in \
+                connection.execute(CHANGES_SINCE, (self.last_change,)):
+            moment = datetime.fromisoformat(time)
+            if op == OP_BOOK:
+                if system.seats.claim(seat_number):
+                    system._class_add(seat_number)
+                system.seat_tickets[seat_number] = ticket_number
+                system.passenger_ids.observe(passenger_id)  # Never hand out the other process's passenger ID
+                system.history.record_booking(self.factory(passenger_id, ticket_number, seat_number, moment))
+            elif op == OP_CANCEL:
+                if system.seat_tickets[seat_number] == ticket_number and system.seats.release(seat_number):
+                    system.seat_tickets[seat_number] = None
+                    system._class_discard(seat_number)
+                reservation = self.factory(passenger_id, ticket_number, seat_number, datetime.fromisoformat(reservation_time))
+                reservation.cancellation_time = moment
+                system.history.record_cancellation(reservation)
+            else:  # A seat change; in a swap the old seat may already belong to the other ticket
+                if system.seat_tickets[old_seat] == ticket_number and system.seats.release(old_seat):
+                    system.seat_tickets[old_seat] = None
+                    system._class_discard(old_seat)
+                if system.seats.claim(seat_number):
+                    system._class_add(seat_number)
+                system.seat_tickets[seat_number] = ticket_number
+                system.history.record_move(moment, old_seat, seat_number)
+            self.last_change = change_id
+
+    # Method to get the scope of one change: the database write lock, with the seat state brought up to date first
+    def transaction(self, system):
+        if getattr(self._local, 'connection', None) is not None:  # Already inside this thread's transaction
+            return NO_TRANSACTION
+        return self._transaction(system)
+
+    @contextmanager
+    def _transaction(self, system):
+        with self._writer, self.pool.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")  # Wait for writers in other processes
+            self._local.connection, self._local.last_change = connection, None
+            try:
+                with system.seat_lock:  # Catch up with the other processes before choosing seats
+                    self._apply_changes(system, connection)
+                yield
+                with system.seat_lock:  # A concurrent sync must not take these changes for another process's
+                    connection.execute("COMMIT")
+                    if self._local.last_change:
+                        self.last_change = self._local.last_change
+            except BaseException:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                raise
+            finally:
+                self._local.connection = None
+
+    # Method to write change records in the calling thread's transaction, one executemany per operation
+    def record(self, records):
+        connection = self._local.connection  # Every change runs inside a transaction
+        for op, group in groupby(records, key=lambda record: record[0]):
+            group = [(passenger_id, ticket_number, seat_number, time.isoformat())
+                     for _, passenger_id, ticket_number, seat_number, time in group]
+            old_seats = [None] * len(group)
+            if op == OP_BOOK:
+                connection.executemany(INSERT_BOOKING, group)
+            elif op == OP_CANCEL:
+                connection.executemany(CANCEL_BOOKING, [(time, ticket_number) for _, ticket_number, _, time in group])
+            else:  # Park every moved ticket on a negative seat first, so swaps never clash in the unique seat index
+                old_seats = [connection.execute(GET_SEAT, (ticket_number,)).fetchone()[0] for _, ticket_number, _, _ in group]
+                connection.executemany(PARK_SEAT, [(ticket_number,) for _, ticket_number, _, _ in group])
+                connection.executemany(MOVE_BOOKING, [(seat_number, ticket_number) for _, ticket_number, seat_number, _ in group])
+            connection.executemany(INSERT_CHANGE, [(op, passenger_id, ticket_number, seat_number, old_seat, time)
+                                                   for (passenger_id, ticket_number, seat_number, time), old_seat
+                                                   in zip(group, old_seats)])
+        self._local.last_change = connection.execute(LATEST_CHANGE).fetchone()[0]  # This process's own changes
+
+    # Method to pick up changes committed by other processes
+    def sync(self, system):
+        if getattr(self._local, 'connection', None) is not None:  # A transaction is already up to date
+            return
+        with self.pool.connection() as connection:
+            if (connection.execute(LATEST_CHANGE).fetchone()[0] or 0) > self.last_change:
+                with system.seat_lock:
+                    self._apply_changes(system, connection)
+
+    # Method to fold the write-ahead log back into the database file
+    def save(self, system):
+        with self.pool.connection() as connection:
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    # Method to close the pooled connections
+    def close(self, system):
+        self.pool.close()
@@ -0,0 +1,114 @@
+# The Widgets of the Airline Reservation System; airline_widgets.py
+import queue  # Import queue for passing work to and from the worker thread
+import threading  # Import threading for the worker thread
+import tkinter as tk  # Import the tkinter module for the list widget
+from tkinter import ttk, font as tkfont  # Import ttk for themed widgets and font for row metrics
+
+POLL_MS = 20  # How often the Tk thread checks for finished work, in milliseconds
+
+# Class for running blocking calls on one worker thread and handing the results back to the Tk thread
+class BackgroundWorker:
+    def __init__(self, root):
+        self.root = root  # Window whose event loop receives the results
+        self.stopped = False  # Set by stop; no more results are delivered after that
+        self._tasks = queue.Queue()  # (call, on_done, on_error) waiting for the worker
+        self._results = queue.Queue()  # (callback, value) waiting for the Tk thread
+        self._thread = threading.Thread(target=self._run, name="gui-worker", daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(POLL_MS, self._poll)  # Results are delivered by the Tk event loop
+
+    # Method to run call() on the worker; on_done(result) or on_error(exception) then runs on the Tk thread
+    def submit(self, call, on_done=None, on_error=None):
+        self._tasks.put((call, on_done, on_error))
+
+    # Method to process calls one at a time, in the order they were submitted
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:  # Stop requested
+                return
+            call, on_done, on_error = task
+            try:
+                self._results.put((on_done, call()))
+            except Exception as e:  # Report the error on the Tk thread instead of killing the worker
+                self._results.put((on_error, e))
+
+    # Method to run the callbacks of finished calls; never called from the worker, since Tk is not thread-safe
+    def _poll(self):
+        while not self.stopped:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if callback:
+                callback(value)
+        if not self.stopped:  # A callback may have stopped the worker and destroyed the window
+            self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    # Method to finish the queued calls and stop the worker
+    def stop(self):
+        self.stopped = True
+        self._tasks.put(None)
+        self._thread.join()
+        self.root.after_cancel(self._poll_id)
+
+# Class for a scrolling list that only creates and fills the rows currently on screen
+class VirtualList(ttk.Frame):
+    def __init__(self, master, row_count=0, row_text=str, width=40, height=20):
+        super().__init__(master)
+        self.row_count = row_count  # Number of rows in the list
+        self.row_text = row_text  # Function returning the text of a row, called only for visible rows
+        self.first = 0  # Index of the top visible row
+        self.items = []  # Canvas text items, reused as the list scrolls
+        self.font = tkfont.nametofont("TkFixedFont")  # Fixed-width font so columns line up
+        self.line = self.font.metrics("linespace") + 2  # Height of one row in pixels
+        self.canvas = tk.Canvas(self, width=self.font.measure("0") * width, height=self.line * height,
+                                background="white", highlightthickness=0, takefocus=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.rowconfigure(0, weight=1)  # Let the list grow with the window
+        self.columnconfigure(0, weight=1)
+        self.canvas.bind("<Configure>", lambda event: self.render())  # More or fewer rows fit after a resize
+        self.canvas.bind("<MouseWheel>", lambda event: self.yview('scroll', -3 if event.delta > 0 else 3, 'units'))
+        self.canvas.bind("<Button-4>", lambda event: self.yview('scroll', -3, 'units'))  # Wheel up on X11
+        self.canvas.bind("<Button-5>", lambda event: self.yview('scroll', 3, 'units'))  # Wheel down on X11
+        self.canvas.bind("<Up>", lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind("<Down>", lambda event: self.yview('scroll', 1, 'units'))
+        self.canvas.bind("<Prior>", lambda event: self.yview('scroll', -1, 'pages'))
+        self.canvas.bind("<Next>", lambda event: self.yview('scroll', 1, 'pages'))
+        self.canvas.bind("<Button-1>", lambda event: self.canvas.focus_set())  # Take the keyboard on click
+
+    # Method to replace the rows shown
+    def set_rows(self, row_count, row_text):
+        self.row_count, self.row_text = row_count, row_text
+        self.first = 0
+        self.render()
+
+    # Method to count the rows that fit on screen
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.line)
+
+    # Method to scroll; called by the scrollbar with ('moveto', fraction) or ('scroll', n, 'units'/'pages')
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * self.row_count)
+        else:
+            step = self.visible_rows() if args[2] == 'pages' else 1
+            first = self.first + int(args[1]) * step
+        self.first = max(0, min(first, self.row_count - self.visible_rows()))
+        self.render()
+
+    # Method to redraw the visible rows
+    def render(self):
+        visible = self.visible_rows()
+        while len(self.items) < visible:  # Create text items only up to the number that fit on screen
+            self.items.append(self.canvas.create_text(4, len(self.items) * self.line, anchor=tk.NW, font=self.font))
+        for slot, item in enumerate(self.items):
+            row = self.first + slot
+            text = self.row_text(row) if slot < visible and row < self.row_count else ""
+            self.canvas.itemconfigure(item, text=text)
+        if self.row_count:  # Size the scrollbar thumb to the visible share of the list
+            self.scrollbar.set(self.first / self.row_count, min(1.0, (self.first + visible) / self.row_count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,111 @@
+# Stress benchmark for concurrent booking; run with: python -m benchmarks.bench_concurrency
+import os  # Import os for temporary file paths
+import random  # Import random for choosing operations
+import sys  # Import sys for the exit status
+import tempfile  # Import tempfile for a throwaway CSV file
+import threading  # Import threading for the worker threads
+import time  # Import time for measuring throughput
+from airline_core import AirlineReservationSystem  # Import the system under test
+from airline_inventory import FlightInventory, SEAT_CLASSES  # Import the multi-flight inventory
+
+THREAD_COUNTS = (1, 2, 4, 8, 16)  # Thread counts to compare
+TOTAL_OPS = 40000  # Operations per round, split across the threads
+ROUNDS = 3  # Rounds per thread count, each on a fresh system
+CAPACITY = 300  # Seats on the flight
+
+# Function run by each worker thread against one shared system
+def hammer(system, tickets, seed, ops, counts):
+    rng = random.Random(seed)  # Each thread gets its own seeded stream
+    done = 0  # Operations this thread performed
+    for _ in range(ops):
+        roll = rng.random()  # Choose an operation
+        if roll < 0.5 or not tickets:  # Book a ticket
+            reservation, _ = system.reserve_ticket()
+            if reservation:
+                tickets.append(reservation.ticket_number)  # list.append is atomic
+        elif roll < 0.8:  # Cancel any thread's ticket, so threads race on the same tickets
+            try:
+                ticket_number = tickets.pop(rng.randrange(len(tickets)))
+            except (IndexError, ValueError):  # Another thread emptied the list first
+                continue
+            system.cancel_ticket(ticket_number)
+        else:  # Move a ticket to a random seat, racing with bookings for the same seat
+            try:
+                ticket_number = tickets[rng.randrange(len(tickets))]
+            except (IndexError, ValueError):
+                continue
+            system.update_reservation(ticket_number, rng.randint(1, CAPACITY))
+        done += 1
+    counts.append(done)
+
+# Function to check that no seat is double-booked and all indexes agree
+def check(system):
+    seats = [reservation.seat_number for reservation in system.reservations.values()]
+    assert len(seats) == len(set(seats)), "seat double-booked"
+    assert len(seats) + system.get_available_seats_count() == system.capacity, "seat map out of sync"
+    for reservation in system.reservations.values():
+        assert not system.seats.is_free(reservation.seat_number), "booked seat marked free"
+        assert system.seat_tickets[reservation.seat_number] == reservation.ticket_number, "seat index out of sync"
+    assert sum(len(system.get_seats_by_class(cls)) for cls in SEAT_CLASSES) == len(system.reservations), "class index out of sync"
+
+# Function to run one round with a given number of threads; returns ops/s and the last round's booking p99 in seconds
+def run_system(thread_count, csv_file):
+    done, elapsed = 0, 0.0  # Totals over all rounds
+    for round_number in range(ROUNDS):
+        for path in (csv_file, csv_file + ".ids"):  # Start every round from an empty flight
+            if os.path.exists(path):
+                os.remove(path)
+        system = AirlineReservationSystem(csv_file, capacity=CAPACITY)
+        tickets, counts = [], []  # Shared ticket list and per-thread operation counts
+        threads = [threading.Thread(target=hammer, args=(system, tickets, round_number * 100 + seed,
+                                                          TOTAL_OPS // thread_count, counts))
+                   for seed in range(thread_count)]
+        start = time.perf_counter()  # Start the timer
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed += time.perf_counter() - start  # Stop the timer
+        check(system)  # Fail loudly on any double booking
+        done += sum(counts)
+    return done / elapsed, system.metrics.histograms['reserve_ticket'].percentile(99)
+
+# Function to run threads that each book their own flights through the inventory
+def run_inventory(thread_count, flights_per_thread=50, ops_per_thread=20000):
+    inventory = FlightInventory()
+    for flight_id in range(thread_count * flights_per_thread):  # Every thread gets its own flights
+        inventory.add_flight(flight_id, CAPACITY)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(ops_per_thread):
+            flight = inventory.flights[rng.randrange(len(inventory))]  # Any flight, so threads also collide
+            seat = rng.randint(1, CAPACITY)
+            if not flight.claim_seat(seat):
+                flight.release_seat(seat)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for flight in inventory.flights.values():  # The cached count must match the bitmap
+        assert len(list(flight.seats)) == flight.seats.free_count, "free count out of sync"
+    return thread_count * ops_per_thread / elapsed
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    csv_file = os.path.join(tempfile.mkdtemp(), "stress.csv")
+    print(f"{'threads':>7} {'system ops/s':>13} {'scaling':>8} {'book p99 ms':>12} {'inventory ops/s':>16} {'scaling':>8}")
+    base_system = base_inventory = None
+    for thread_count in THREAD_COUNTS:
+        system_rate, book_p99 = run_system(thread_count, csv_file)
+        inventory_rate = run_inventory(thread_count)
+        base_system = base_system or system_rate
+        base_inventory = base_inventory or inventory_rate
+        print(f"{thread_count:>7} {system_rate:>13,.0f} {system_rate / base_system:>7.2f}x {book_p99 * 1000:>12.3f} "
+              f"{inventory_rate:>16,.0f} {inventory_rate / base_inventory:>7.2f}x")
+    print("No double bookings detected")
+    sys.exit(0)
@@ -0,0 +1,43 @@
+# Time-range analytics benchmark; run with: python -m benchmarks.bench_history [events]
+import random  # Import random for the synthetic event stream
+import sys  # Import sys for the command-line count
+import time  # Import time for timing the queries
+from array import array  # Import array for building the event columns directly
+from datetime import datetime, timedelta  # Import datetime for the query ranges
+import airline_history  # Import the history module to report which path is used
+from airline_history import ReservationHistory, BOOKED, CANCELLED, MOVED  # Import the history store
+from airline_columns import to_micros  # Import the timestamp encoding
+
+CAPACITY = 300  # Seats on the simulated aircraft
+START = datetime(2024, 1, 1)  # First event of the stream
+
+# Function to build a history of count time-ordered events spread over a year
+def build(count):
+    rng = random.Random(5)
+    history = ReservationHistory()
+    step = 365 * 24 * 3600 * 1000000 // count  # Average gap between events, microseconds
+    first = to_micros(START)
+    history.times = array('q', (first + i * step + rng.randrange(step) for i in range(count)))
+    history.kinds = array('b', (rng.choice((BOOKED, BOOKED, CANCELLED, MOVED)) for _ in range(count)))
+    history.seats = array('i', (rng.randint(1, CAPACITY) for _ in range(count)))
+    history.old_seats = array('i', (rng.randint(1, CAPACITY) if kind == MOVED else 0 for kind in history.kinds))
+    return history
+
+# Function to time one query
+def timed(label, query):
+    start = time.perf_counter()
+    result = query()
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:9.1f} ms ({len(result):,} rows)")
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    history = build(count)
+    print(f"Events: {count:,} over one year, {'NumPy' if airline_history.np is not None else 'pure-Python'} aggregation")
+    month = (START + timedelta(days=180), START + timedelta(days=210))
+    timed("bookings per hour, whole year", history.bookings_per_hour)
+    timed("cancellations per hour, one month", lambda: history.cancellations_per_hour(*month))
+    timed("load factor per hour, whole year", lambda: history.load_factor(CAPACITY))
+    timed("load factor per day, one month", lambda: history.load_factor(CAPACITY, *month, bucket=timedelta(days=1)))
+    timed("churn per seat class, whole year", history.churn_by_seat_class)
+    timed("churn per seat class, one month", lambda: history.churn_by_seat_class(*month))
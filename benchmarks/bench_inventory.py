@@ -0,0 +1,51 @@
+# Benchmark for the flight inventory; run with: python -m benchmarks.bench_inventory
+import random  # Import random for picking seats to claim
+import time  # Import time for measuring operation speed
+import tracemalloc  # Import tracemalloc for measuring memory use
+from airline_inventory import FlightInventory  # Import the bitmap-based inventory
+
+FLIGHTS = 10000  # Number of flights to build
+CAPACITY = 300  # Seats per flight
+
+# Function to measure the memory taken by building something
+def measure(build):
+    tracemalloc.start()  # Start tracking allocations
+    result = build()  # Build the structure
+    size, _ = tracemalloc.get_traced_memory()  # Memory still held by the structure
+    tracemalloc.stop()  # Stop tracking allocations
+    return result, size
+
+# Function to build the inventory as per-flight bitmaps
+def build_bitmaps():
+    inventory = FlightInventory()  # Create an empty inventory
+    for flight_id in range(FLIGHTS):  # Add every flight
+        inventory.add_flight(flight_id, CAPACITY)
+    return inventory
+
+# Function to build the inventory the old way, as a set of ints per flight
+def build_sets():
+    return {flight_id: set(range(1, CAPACITY + 1)) for flight_id in range(FLIGHTS)}
+
+# Function to time claim, move, release and count operations on the bitmap inventory
+def time_operations(inventory, rounds=200000):
+    rng = random.Random(42)  # Seeded so runs are comparable
+    picks = [(rng.randrange(FLIGHTS), rng.randint(1, CAPACITY), rng.randint(1, CAPACITY)) for _ in range(rounds)]
+    start = time.perf_counter()  # Start the timer
+    for flight_id, seat, other in picks:  # Claim, move, release and count on random flights
+        seats = inventory.flights[flight_id].seats
+        if seats.claim(seat):
+            if seats.move(seat, other):
+                seat = other
+            seats.release(seat)
+        len(seats)
+    elapsed = time.perf_counter() - start  # Stop the timer
+    return rounds / elapsed
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    inventory, bitmap_bytes = measure(build_bitmaps)  # Measure the bitmap inventory
+    _, set_bytes = measure(build_sets)  # Measure the set-of-ints baseline
+    print(f"Flights: {FLIGHTS} x {CAPACITY} seats")
+    print(f"Bitmap inventory: {bitmap_bytes / 2**20:8.2f} MiB ({bitmap_bytes / FLIGHTS:7.1f} bytes/flight)")
+    print(f"Set-of-ints:      {set_bytes / 2**20:8.2f} MiB ({set_bytes / FLIGHTS:7.1f} bytes/flight)")
+    print(f"Claim/move/release/count rounds: {time_operations(inventory):,.0f} per second")
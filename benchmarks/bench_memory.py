@@ -0,0 +1,58 @@
+# Memory benchmark for reservation storage; run with: python -m benchmarks.bench_memory [count]
+import gc  # Import gc so earlier runs do not skew later ones
+import random  # Import random for seat numbers and ticket extensions
+import sys  # Import sys for the command-line count
+import tracemalloc  # Import tracemalloc for measuring memory use
+from datetime import datetime, timedelta  # Import datetime for booking times
+from airline_core import Reservation  # Import the __slots__ reservation
+from airline_columns import ReservationColumns  # Import the columnar store
+
+# The dict-backed reservation as it was before __slots__, kept here for comparison
+class DictReservation:
+    def __init__(self, passenger_id, ticket_number, seat_number, reservation_time):
+        self.passenger_id = passenger_id
+        self.ticket_number = ticket_number
+        self.seat_number = seat_number
+        self.reservation_time = reservation_time
+        self.cancellation_time = None
+
+# Function to generate raw reservation fields, seeded so every layout stores the same data
+def rows(count):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        passenger_id = 100 + i
+        yield (passenger_id, f"{passenger_id}-{rng.randint(10000, 99999)}", rng.randint(1, 300),
+               start + timedelta(seconds=i, microseconds=rng.randrange(1000000)))
+
+# Function to build a dictionary of reservation objects keyed by ticket number, as the system does
+def build_objects(cls, count):
+    reservations = {}
+    for passenger_id, ticket_number, seat_number, reservation_time in rows(count):
+        reservations[ticket_number] = cls(passenger_id, ticket_number, seat_number, reservation_time)
+    return reservations
+
+# Function to build a columnar store
+def build_columns(count):
+    return ReservationColumns.from_reservations(
+        Reservation(*fields) for fields in rows(count))
+
+# Function to measure the memory held by what build returns
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    result = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"Reservations: {count:,}")
+    for label, build in (("dict-backed objects", lambda n: build_objects(DictReservation, n)),
+                         ("__slots__ objects", lambda n: build_objects(Reservation, n)),
+                         ("columnar store", build_columns)):
+        size = measure(build, count)
+        print(f"{label:<20} {size / 2**20:9.1f} MiB {size / count:8.1f} bytes/reservation")
@@ -0,0 +1,53 @@
+# Benchmark for seat allocation; run with: python -m benchmarks.bench_seat_allocation
+import random  # Import random for the old allocation path
+import time  # Import time for measuring allocation speed
+from airline_inventory import SeatPool, WINDOW, LOWEST  # Import the O(1) seat pool
+
+CABINS = (100, 300, 853, 5000)  # Cabin sizes to bulk-book
+
+# Function to fill a cabin the old way: random.choice over a copy of the free set
+def fill_with_set(capacity):
+    seats = set(range(1, capacity + 1))  # Every seat starts free
+    start = time.perf_counter()  # Start the timer
+    while seats:  # Book until the cabin is full
+        seat = random.choice(list(seats))  # Copy every free seat on every booking
+        seats.remove(seat)
+    return time.perf_counter() - start
+
+# Function to fill a cabin using the seat pool and a given preference
+def fill_with_pool(capacity, preference=None):
+    seats = SeatPool(capacity)  # Every seat starts free
+    start = time.perf_counter()  # Start the timer
+    while seats.free_count:  # Book until the cabin is full
+        seats.claim(seats.pick(preference))  # O(1) pick and claim
+    return time.perf_counter() - start
+
+# Function to time cancelling and re-booking seats in a half-full cabin
+def churn_with_pool(capacity, rounds=100000):
+    seats = SeatPool(capacity)  # Every seat starts free
+    taken = []  # Seats currently booked
+    for _ in range(capacity // 2):  # Fill half the cabin
+        seat = seats.pick()
+        seats.claim(seat)
+        taken.append(seat)
+    start = time.perf_counter()  # Start the timer
+    for i in range(rounds):  # Cancel one booking and make another
+        index = i % len(taken)
+        seats.release(taken[index])
+        seat = seats.pick()
+        seats.claim(seat)
+        taken[index] = seat
+    return time.perf_counter() - start
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    print(f"{'seats':>6} {'set+list us/seat':>17} {'pool us/seat':>13} {'window us/seat':>15} {'lowest us/seat':>15}")
+    for capacity in CABINS:  # Bulk-book each cabin size with each path
+        old = fill_with_set(capacity) / capacity * 1e6
+        new = fill_with_pool(capacity) / capacity * 1e6
+        window = fill_with_pool(capacity, WINDOW) / capacity * 1e6
+        lowest = fill_with_pool(capacity, LOWEST) / capacity * 1e6
+        print(f"{capacity:>6} {old:>17.2f} {new:>13.2f} {window:>15.2f} {lowest:>15.2f}")
+    rounds = 100000
+    elapsed = churn_with_pool(300, rounds)  # Cancel/re-book cycle on a 300-seat cabin
+    print(f"Cancel + re-book on a half-full 300-seat cabin: {elapsed / rounds * 1e6:.2f} us per cycle")
@@ -0,0 +1,67 @@
+# Cold-start benchmark, CSV versus binary snapshot; run with: python -m benchmarks.bench_startup [count]
+import csv  # Import csv for writing the CSV dataset
+import os  # Import os for file paths
+import random  # Import random for the synthetic dataset
+import subprocess  # Import subprocess so every start is a fresh interpreter
+import sys  # Import sys for the interpreter path and the command-line count
+import tempfile  # Import tempfile for the dataset directory
+from datetime import datetime, timedelta  # Import datetime for booking times
+from airline_core import Reservation, CSV_FIELDS  # Import the reservation type and CSV layout
+from airline_inventory import SeatMap  # Import the seat bitmap
+from airline_snapshot import write_snapshot, pack_reservation  # Import the binary snapshot writer
+
+# Code run in a fresh interpreter: open the system and ask for the available seat count
+STARTUP = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from airline_core import AirlineReservationSystem
+system = AirlineReservationSystem({csv_file!r}, capacity={capacity}, snapshot_file={snapshot_file!r})
+count = system.get_available_seats_count()
+first = time.perf_counter() - start
+system.get_ticket_info({ticket!r})
+print(first, time.perf_counter() - start - first, count)
+"""
+
+# Function to build the same dataset as a CSV file and as a binary snapshot
+def build(directory, count, capacity):
+    rng = random.Random(11)
+    seats = rng.sample(range(1, capacity + 1), count)  # Distinct seats for every reservation
+    start = datetime(2024, 1, 1)
+    reservations = [Reservation(100 + i, f"{100 + i}-{rng.randint(10000, 99999)}", seats[i],
+                                start + timedelta(seconds=i)) for i in range(count)]
+    csv_file = os.path.join(directory, "bench.csv")
+    with open(csv_file, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows([r.passenger_id, r.ticket_number, r.seat_number, r.reservation_time.isoformat(), '']
+                         for r in reservations)
+    seat_map = SeatMap(capacity)
+    for seat in seats:
+        seat_map.claim(seat)
+    snapshot_file = os.path.join(directory, "bench.snap")
+    write_snapshot(snapshot_file, capacity, seat_map.bits, seat_map.free_count,
+                   [pack_reservation(r) for r in reservations], 100 + count)
+    return csv_file, snapshot_file, reservations[count // 2].ticket_number
+
+# Function to time one cold start in a fresh interpreter
+def cold_start(csv_file, snapshot_file, capacity, ticket):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = STARTUP.format(root=root, csv_file=csv_file, capacity=capacity, snapshot_file=snapshot_file, ticket=ticket)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    first, lookup, free = output.split()
+    return float(first), float(lookup), int(free)
+
+# Main entry point of the benchmark
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    capacity = count + count // 10  # Leave some seats free
+    directory = tempfile.mkdtemp()
+    csv_file, snapshot_file, ticket = build(directory, count, capacity)
+    print(f"Reservations: {count:,} on a {capacity:,}-seat flight")
+    print(f"CSV file:        {os.path.getsize(csv_file) / 2**20:8.1f} MiB")
+    print(f"Binary snapshot: {os.path.getsize(snapshot_file) / 2**20:8.1f} MiB")
+    for label, snapshot in (("CSV", None), ("binary snapshot", snapshot_file)):
+        first, lookup, free = cold_start(csv_file, snapshot, capacity, ticket)
+        print(f"{label:<16} first get_available_seats_count after {first * 1000:9.1f} ms "
+              f"({free:,} free), then first ticket lookup {lookup * 1000:.3f} ms")
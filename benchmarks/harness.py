@@ -0,0 +1,164 @@
+# Reproducible benchmark suite for the core system; run with: python -m benchmarks.harness [--baseline old.json]
+import argparse  # Import argparse for command-line options
+import gc  # Import gc so one case does not skew the next
+import json  # Import json for the results file
+import os  # Import os for file paths
+import platform  # Import platform for recording where the run happened
+import random  # Import random for seeding ticket numbers
+import shutil  # Import shutil for copying the prepared dataset
+import sys  # Import sys for the exit status
+import tempfile  # Import tempfile for the dataset directories
+import tracemalloc  # Import tracemalloc for peak memory
+from time import perf_counter  # Import perf_counter for timing
+from airline_core import AirlineReservationSystem  # Import the system under test
+from airline_storage import SqliteStorage  # Import the SQLite storage backend
+from benchmarks.workload import DEFAULT_MIX, Workload, write_dataset, percentile  # Import the workload generator
+
+# Figures compared against a baseline, and whether a higher value is better
+COMPARED = (('ops_per_sec', True), ('p99_ms', False), ('load_s', False), ('save_s', False), ('peak_mib', False))
+
+# Function to prepare a case's starting files: the CSV dataset plus whatever the first save writes beside it
+def prepare(directory, capacity, history, args):
+    csv_file = os.path.join(directory, "bench.csv")
+    booked = write_dataset(csv_file, capacity, history, args.fill, args.seed)
+    system = open_system(directory, capacity, args)  # Import the CSV once so the timed load reads the real format
+    system.save_reservations()
+    system.storage.close(system)
+    return booked
+
+# Function to open the system on a case directory
+def open_system(directory, capacity, args):
+    csv_file = os.path.join(directory, "bench.csv")
+    snapshot_file = os.path.join(directory, "bench.snap") if args.storage == 'binary' else None
+    storage = SqliteStorage(os.path.join(directory, "bench.db"), import_csv=csv_file) if args.storage == 'sqlite' else None
+    return AirlineReservationSystem(csv_file, journaled=args.journaled, capacity=capacity,
+                                    snapshot_file=snapshot_file, storage=storage)
+
+# Function to load, run the workload and save once on a fresh copy of the prepared files
+def run_once(prepared, capacity, operations, args, traced=False):
+    directory = tempfile.mkdtemp()
+    shutil.rmtree(directory)
+    shutil.copytree(prepared, directory)  # Every run starts from identical files
+    random.seed(args.seed)  # Ticket extensions come from the global generator
+    gc.collect()
+    if traced:
+        tracemalloc.start()
+    try:
+        start = perf_counter()
+        system = open_system(directory, capacity, args)
+        load = perf_counter() - start
+        tickets = [reservation.ticket_number for reservation in system.reservations.values()]
+        latencies = {}  # Latencies in seconds by operation
+        start = perf_counter()
+        for op, pick, seat in operations:
+            began = perf_counter()
+            ran = Workload.apply(system, op, pick, seat, tickets)
+            latencies.setdefault(ran, []).append(perf_counter() - began)
+        elapsed = perf_counter() - start
+        start = perf_counter()
+        system.save_reservations()
+        save = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if traced else None
+    finally:
+        if traced:
+            tracemalloc.stop()
+    system.storage.close(system)
+    shutil.rmtree(directory)
+    return load, elapsed, save, latencies, peak
+
+# Function to summarize latencies as milliseconds
+def summarize(samples):
+    samples = sorted(samples)
+    return {'count': len(samples), 'p50_ms': percentile(samples, 0.50) * 1000, 'p90_ms': percentile(samples, 0.90) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000, 'max_ms': samples[-1] * 1000 if samples else 0.0}
+
+# Function to run one (capacity, history) case
+def run_case(capacity, history, args):
+    prepared = tempfile.mkdtemp()
+    booked = prepare(prepared, capacity, history, args)
+    operations = Workload(args.mix, args.seed, capacity).operations(args.ops)
+    runs = [run_once(prepared, capacity, operations, args) for _ in range(args.repeat)]
+    load = min(run[0] for run in runs)  # Best of the repeats, the least disturbed by other work on the machine
+    save = min(run[2] for run in runs)
+    _, elapsed, _, latencies, _ = min(runs, key=lambda run: run[1])
+    peak = None
+    if not args.no_memory:  # Repeat the same run under tracemalloc, which is too slow to time
+        peak = run_once(prepared, capacity, operations, args, traced=True)[4] / 2**20
+    shutil.rmtree(prepared)
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'capacity': capacity, 'history': history, 'booked': booked, 'ops': len(operations),
+        'ops_per_sec': len(operations) / elapsed, 'p99_ms': summarize(every)['p99_ms'],
+        'load_s': load, 'save_s': save, 'peak_mib': peak,
+        'latency': {op: summarize(samples) for op, samples in sorted(latencies.items())},
+    }
+
+# Function to print one case
+def report(result):
+    peak = f"{result['peak_mib']:.1f} MiB" if result['peak_mib'] is not None else "n/a"
+    print(f"capacity {result['capacity']:,}, history {result['history']:,}, booked {result['booked']:,}: "
+          f"{result['ops_per_sec']:,.0f} ops/s, load {result['load_s'] * 1000:.1f} ms, "
+          f"save {result['save_s'] * 1000:.1f} ms, peak {peak}")
+    for op, summary in result['latency'].items():
+        print(f"  {op:<8} {summary['count']:>8} ops  p50 {summary['p50_ms']:.4f} ms  "
+              f"p90 {summary['p90_ms']:.4f} ms  p99 {summary['p99_ms']:.4f} ms  max {summary['max_ms']:.3f} ms")
+
+# Function to compare results with a baseline; returns the regressions found
+def compare(results, baseline, tolerance):
+    previous = {(case['capacity'], case['history']): case for case in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline.get('label', 'baseline')} (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = previous.get((result['capacity'], result['history']))
+        if old is None:  # The baseline did not run this case
+            continue
+        for key, higher_is_better in COMPARED:
+            if not old.get(key) or result[key] is None:
+                continue
+            change = result[key] / old[key] - 1
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+            print(f"  capacity {result['capacity']:>7,} history {result['history']:>9,} {key:<12}"
+                  f"{old[key]:>14.4f} -> {result[key]:<14.4f}{change:+8.1%}  {flag}")
+            if flag == "REGRESSION":
+                regressions.append((result['capacity'], result['history'], key))
+    return regressions
+
+# Function to split a comma-separated list of integers
+def int_list(text):
+    return [int(item) for item in text.split(',')]
+
+# Main entry point of the benchmark suite
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite for AirlineReservationSystem")
+    parser.add_argument("--capacity", type=int_list, default=[100, 1000, 10000], help="aircraft sizes, e.g. 100,1000")
+    parser.add_argument("--history", type=int_list, default=[0, 100000], help="cancelled reservations in the dataset")
+    parser.add_argument("--fill", type=float, default=0.5, help="share of the cabin booked at the start")
+    parser.add_argument("--ops", type=int, default=20000, help="operations per case")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. book=10,info=90")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--storage", choices=('csv', 'binary', 'sqlite'), default='csv', help="storage format")
+    parser.add_argument("--journaled", action="store_true", help="journal every change")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--label", default=None, help="name of this run in comparisons")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to save the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for capacity in args.capacity:
+        for history in args.history:
+            results.append(run_case(capacity, history, args))
+            report(results[-1])
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'label')}
+    document = {'label': args.label or args.output, 'python': platform.python_version(),
+                'platform': platform.platform(), 'config': config, 'results': results}
+    with open(args.output, 'w') as file:
+        json.dump(document, file, indent=2)
+    print(f"\nResults saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,118 @@
+# Load generator for the reservation service; run with: python -m benchmarks.loadgen
+import argparse  # Import argparse for command-line options
+import asyncio  # Import asyncio for the concurrent clients
+import json  # Import json for encoding requests
+import os  # Import os for locating the server script
+import random  # Import random for choosing operations
+import signal  # Import signal for stopping a spawned server cleanly
+import subprocess  # Import subprocess for spawning a local server
+import sys  # Import sys for the interpreter path
+import tempfile  # Import tempfile for the spawned server's CSV file
+import time  # Import time for measuring latency
+from benchmarks.workload import DEFAULT_MIX, parse_mix, percentile  # Import the shared workload helpers
+
+# Function to build the next request for a client
+def make_request(op, rng, tickets, capacity):
+    if op == 'book':
+        return {'op': 'book'}
+    if op in ('window', 'seats'):
+        return {'op': op}
+    if op == 'seat':
+        return {'op': 'seat', 'seat_number': rng.randint(1, capacity)}
+    if not tickets:  # Nothing booked yet; fall back to a cheap read
+        return {'op': 'seats'}
+    ticket_number = rng.choice(tickets)
+    if op == 'update':
+        return {'op': 'update', 'ticket_number': ticket_number, 'seat_number': rng.randint(1, capacity)}
+    return {'op': op, 'ticket_number': ticket_number}
+
+# Function run by each simulated client: open a connection and send requests one at a time
+async def client(host, port, requests, ops, weights, seed, tickets, capacity, latencies, errors):
+    rng = random.Random(seed)  # Each client gets its own seeded stream
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:  # Count refused connections instead of aborting the run
+        errors.append('connect')
+        return
+    try:
+        for _ in range(requests):
+            request = make_request(rng.choices(ops, weights)[0], rng, tickets, capacity)
+            start = time.perf_counter()  # Time the full round trip
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not line:  # The server hung up
+                errors.append('closed')
+                return
+            response = json.loads(line)
+            if request['op'] == 'book' and response.get('ok'):  # Share booked tickets with every client
+                tickets.append(response['reservation']['ticket_number'])
+            elif request['op'] == 'cancel' and response.get('ok'):
+                try:
+                    tickets.remove(request['ticket_number'])
+                except ValueError:
+                    pass
+    except (ConnectionError, OSError):
+        errors.append('reset')
+    finally:
+        writer.close()
+
+# Function to fetch the server's own metrics
+async def fetch_metrics(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps({'op': 'metrics'}).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())['metrics']
+    finally:
+        writer.close()
+
+# Function to run every client and report the results
+async def run(args, host, port):
+    ops, weights = parse_mix(args.mix)
+    tickets, latencies, errors = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, args.requests, ops, weights, args.seed + i, tickets,
+                                  args.capacity, latencies, errors) for i in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"Connections: {args.connections}, requests: {len(latencies)}, errors: {len(errors)}")
+    print(f"Throughput:  {len(latencies) / elapsed:,.0f} requests/s over {elapsed:.2f} s")
+    print(f"Latency:     p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+    metrics = await fetch_metrics(host, port)  # Server-side view of the same run
+    for name, summary in metrics['latency'].items():
+        print(f"  server {name:<22} {summary['count']:>8} calls, p50 {summary['p50_ms']:.3f} ms, p99 {summary['p99_ms']:.3f} ms")
+
+# Function to start a local server on a free port with a throwaway CSV file
+def spawn_server(capacity):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "airline_server.py")
+    csv_file = os.path.join(tempfile.mkdtemp(), "loadgen.csv")
+    process = subprocess.Popen([sys.executable, script, "--port", "0", "--csv-file", csv_file,
+                                "--capacity", str(capacity)], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # "Listening on host:port"
+    host, port = line.rsplit(' ', 1)[1].rsplit(':', 1)
+    return process, host, int(port)
+
+# Main entry point of the load generator
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for airline_server.py")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, help="server port; omit to spawn a local server")
+    parser.add_argument("--connections", type=int, default=1000, help="concurrent client connections")
+    parser.add_argument("--requests", type=int, default=20, help="requests per connection")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. book=10,info=90")
+    parser.add_argument("--capacity", type=int, default=1000, help="seats on the spawned server's flight")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+    process = None
+    host, port = args.host, args.port
+    if port is None:  # Spawn a server for the run
+        process, host, port = spawn_server(args.capacity)
+    try:
+        asyncio.run(run(args, host, port))
+    finally:
+        if process:  # Stop the spawned server; it saves its snapshot on the way out
+            process.send_signal(signal.SIGINT)
+            process.wait()
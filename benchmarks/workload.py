@@ -0,0 +1,77 @@
+# Seeded synthetic workload shared by the benchmarks; used by benchmarks.harness and benchmarks.loadgen
+import csv  # Import csv for writing the starting dataset
+import random  # Import random for the seeded operation stream
+from datetime import datetime, timedelta  # Import datetime for booking and cancellation times
+from airline_core import CSV_FIELDS  # Import the CSV layout
+
+DEFAULT_MIX = "book=10,cancel=5,update=5,info=40,seat=10,window=10,seats=20"  # Default operation weights
+
+# Function to parse "op=weight,..." into parallel lists of operations and weights
+def parse_mix(mix):
+    pairs = [item.split('=') for item in mix.split(',')]
+    return [op for op, _ in pairs], [float(weight) for _, weight in pairs]
+
+# Function to compute a percentile from sorted samples
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+# Function to write a starting CSV with `history` cancelled rows and `fill` of the cabin booked; returns the booked count
+def write_dataset(csv_file, capacity, history, fill, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    booked = int(capacity * fill)
+    seats = rng.sample(range(1, capacity + 1), booked)  # Distinct seats for the live bookings
+    with open(csv_file, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_FIELDS)
+        for i in range(history):  # Bookings that were cancelled later
+            booked_at = start + timedelta(seconds=i)
+            writer.writerow([100 + i, f"{100 + i}-{rng.randint(10000, 99999)}", rng.randint(1, capacity),
+                             booked_at.isoformat(), (booked_at + timedelta(hours=rng.randint(1, 72))).isoformat()])
+        for i, seat in enumerate(seats):  # Bookings still held
+            passenger_id = 100 + history + i
+            writer.writerow([passenger_id, f"{passenger_id}-{rng.randint(10000, 99999)}", seat,
+                             (start + timedelta(seconds=history + i)).isoformat(), ''])
+    return booked
+
+# Class for a reproducible stream of operations against one system
+class Workload:
+    def __init__(self, mix=DEFAULT_MIX, seed=1, capacity=100):
+        self.ops, self.weights = parse_mix(mix)  # Operations and their relative weights
+        self.seed = seed  # Seed of the operation stream
+        self.capacity = capacity  # Seats on the flight, for seat-number arguments
+
+    # Method to generate count (op, pick, seat) tuples; pick chooses among the live tickets when the op runs
+    def operations(self, count):
+        rng = random.Random(self.seed)
+        ops = rng.choices(self.ops, self.weights, k=count)  # Draw the whole op sequence up front
+        return [(op, rng.random(), rng.randint(1, self.capacity)) for op in ops]
+
+    # Method to run one operation; tickets is the shared list of live ticket numbers; returns the op actually run
+    @staticmethod
+    def apply(system, op, pick, seat, tickets):
+        if op == 'book':
+            reservation, _ = system.reserve_ticket()
+            if reservation:
+                tickets.append(reservation.ticket_number)
+            return op
+        if op == 'seat':
+            system.get_seat_occupant(seat)
+            return op
+        if op == 'window':
+            system.get_window_seats()
+            return op
+        if op == 'seats' or not tickets:  # Nothing booked yet; fall back to a cheap read
+            system.get_available_seats_count()
+            return 'seats'
+        index = int(pick * len(tickets))
+        if op == 'cancel':
+            tickets[index], tickets[-1] = tickets[-1], tickets[index]  # Swap-remove keeps the pick O(1)
+            system.cancel_ticket(tickets.pop())
+        elif op == 'update':
+            system.update_reservation(tickets[index], seat)
+        else:  # 'info'
+            system.get_ticket_info(tickets[index])
+        return op
@@ -0,0 +1,68 @@
+# Regression tests for reopening a journaled store; run with: python -m unittest discover tests
+import os  # Import os for file paths
+import shutil  # Import shutil for removing the store directory
+import sys  # Import sys so the root modules import when run from any directory
+import tempfile  # Import tempfile for the store directory
+import time  # Import time for waiting on the background compaction
+import unittest  # Import unittest for the test case
+from datetime import datetime  # Import datetime for the record timestamps
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from airline_core import AirlineReservationSystem  # Import the system under test
+from airline_journal import OP_BOOK, ReservationJournal  # Import the journal to write records behind the system's back
+
+BOOKINGS = 10050  # More records than the journal's compaction threshold
+
+
+# Test case for recovering a store whose journal is long enough to trigger a compaction on open
+class JournalRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()  # Fresh store for every test
+        self.csv_file = os.path.join(self.directory, "reservations.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # Method to open the system on the test store
+    def open_system(self, snapshot):
+        snapshot_file = os.path.join(self.directory, "reservations.snap") if snapshot else None
+        return AirlineReservationSystem(self.csv_file, journaled=True, capacity=BOOKINGS, snapshot_file=snapshot_file)
+
+    # Method to leave a saved store plus a journal of BOOKINGS bookings, as after a crash
+    def crash_with_long_journal(self, snapshot):
+        system = self.open_system(snapshot)
+        system.save_reservations()  # Write the (empty) snapshot or CSV the journal is replayed onto
+        system.storage.journal.close()  # Crash: no final compaction
+        journal = ReservationJournal(system.storage.journal.log_file)  # Not started, so it never compacts
+        now = datetime.now()
+        for seat in range(1, BOOKINGS + 1):
+            journal.append(OP_BOOK, seat, f"T{seat:05d}", seat, now)
+        journal.close()
+
+    # Method to wait until the background worker has folded the journal into the store
+    def wait_for_compaction(self, system):
+        journal = system.storage.journal
+        deadline = time.monotonic() + 10
+        while (journal._records or os.path.exists(journal.rotated_file)) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    # Method to check that a compaction triggered by the replayed journal keeps every booking
+    def check_recovery(self, snapshot):
+        self.crash_with_long_journal(snapshot)
+        system = self.open_system(snapshot)
+        self.assertEqual(len(system.reservations), BOOKINGS)
+        self.wait_for_compaction(system)
+        system.storage.journal.close()  # Crash again, after the compaction
+        system = self.open_system(snapshot)
+        self.assertEqual(len(system.reservations), BOOKINGS)
+        self.assertEqual(system.get_available_seats_count(), 0)
+        system.close()
+
+    def test_csv_recovery_compacts_after_replay(self):
+        self.check_recovery(snapshot=False)
+
+    def test_snapshot_recovery_compacts_after_replay(self):
+        self.check_recovery(snapshot=True)
+
+
+if __name__ == '__main__':
+    unittest.main()